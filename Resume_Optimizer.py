@@ -4,12 +4,22 @@ import json
 import base64
 import os
 import tempfile
+import time
+import hashlib
+import re
+import sqlite3
+import queue
+import threading
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
 from datetime import datetime
 from agno.agent import Agent
 from agno.models.google import Gemini
 from dotenv import load_dotenv
 import io
 import fitz  # PyMuPDF
+import numpy as np
 
 # Load environment variables
 load_dotenv()
@@ -21,111 +31,415 @@ st.set_page_config(
     layout="wide"
 )
 
+# Gemini model behind both agents
+GEMINI_MODEL_ID = os.getenv("GEMINI_MODEL_ID", "gemini-2.0-flash-exp")
+
+# Configuration of the resume optimizer agent
+OPTIMIZER_AGENT_CONFIG = dict(
+    description="You are an expert resume optimizer with deep knowledge of various industries and job requirements.",
+    instructions="""
+    # Resume Enhancement Process
+    
+    ## Analysis Phase
+    1. Analyze the provided job description thoroughly
+       - Extract key requirements, skills, and qualifications
+       - Identify industry-specific terminology and buzzwords
+       - Note preferred experience levels and education requirements
+       
+    2. Evaluate the current resume (payload) against job requirements
+       - Identify strengths that already align with the job description
+       - Spot gaps and improvement opportunities
+       - Determine which sections need enhancement
+    
+    ## Enhancement Phase  
+    3. Modify the resume content to improve job alignment while preserving core facts:
+       - Rephrase experience descriptions using industry-relevant terminology
+       - Highlight transferable skills that match job requirements
+       - Restructure accomplishments to demonstrate relevant outcomes
+       - Ensure all modifications maintain factual accuracy of:
+         * Educational background and institutions
+         * Certification names and credentials
+         * Employment history timeline and company names
+         * Core technical skills and technologies
+    
+    4. DO NOT fabricate or add:
+       - New jobs or positions not in original payload
+       - Skills or technologies not listed in original payload
+       - Educational degrees or certifications not listed in original payload
+       - Projects that don't exist in the original payload
+    
+    ## Scoring and Reporting
+    5. Score the original resume against the job description
+    6. Score the enhanced resume against the job description
+    7. Provide a detailed comparison showing improvements
+    
+    ## Important Guidelines
+    - Focus on professional enhancement through better wording, not factual changes
+    - Maintain the person's actual career trajectory and capabilities
+    - Use industry-standard terminology appropriate for the target position
+    - Eliminate irrelevant content that doesn't support the job application
+    - Fix grammatical errors and improve overall professional tone
+    """,
+    expected_output="""
+    # Resume Enhancement Report
+    
+    ## Job Description Analysis
+    {Summary of key requirements and skills from the job description}
+    
+    ## Original Resume Assessment
+    {Brief evaluation of original resume's alignment with job requirements}
+    
+    ## Enhanced Resume Payload
+    ```json
+    {Complete enhanced JSON payload with all optimized fields}
+    ```
+    
+    ## Improvement Summary
+    - Experience Descriptions: {Specific improvements made}
+    - Skills Presentation: {How skills were better aligned}
+    - Project Descriptions: {How projects were reframed to match requirements}
+    - Overall Language Enhancement: {Terminology improvements}
+    
+    ## Scoring Comparison
+    | Category | Original Score | Enhanced Score | Improvement |
+    |----------|---------------|----------------|-------------|
+    | Relevant Experience | {score}/100 | {score}/100 | +{points} |
+    | Skills Match | {score}/100 | {score}/100 | +{points} |
+    | Education & Certs | {score}/100 | {score}/100 | +{points} |
+    | Overall Fit | {score}/100 | {score}/100 | +{points} |
+    
+    ## Overall Match Percentage: {Original score}% → {Enhanced score}%
+    
+    ## Key Improvements Made
+    1. {First major improvement}
+    2. {Second major improvement}
+    3. {Third major improvement}
+    
+    ## Unchanged Elements (Core Facts Preserved)
+    - All employment history dates and company names
+    - Educational credentials and institutions
+    - Certification titles
+    - Core technical skills
+    """,
+)
+
+# Disk cache of agent responses, shared by every session and process on this machine
+LLM_CACHE_PATH = os.getenv(
+    "LLM_CACHE_PATH",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "llm_cache.sqlite3")
+)
+LLM_CACHE_TTL_SECONDS = int(os.getenv("LLM_CACHE_TTL_SECONDS", 7 * 24 * 3600))
+LLM_CACHE_MAX_ENTRIES = int(os.getenv("LLM_CACHE_MAX_ENTRIES", 500))
+
+class CachedResponse:
+    """Stand-in for an agno RunResponse served from the cache"""
+    
+    def __init__(self, content):
+        self.content = content
+        self.cached = True
+
+class LLMResponseCache:
+    """SQLite store of response texts with a TTL and least-recently-used eviction.
+    
+    Hit and miss counts live in the database too, so the reported hit rate covers
+    every process using the file.
+    """
+    
+    def __init__(self, path, ttl_seconds, max_entries):
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        with self._connect() as db:
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                "key TEXT PRIMARY KEY, content TEXT NOT NULL, created_at REAL NOT NULL, last_used REAL NOT NULL)"
+            )
+            db.execute("CREATE INDEX IF NOT EXISTS responses_last_used ON responses (last_used)")
+            db.execute("CREATE TABLE IF NOT EXISTS counters (name TEXT PRIMARY KEY, value INTEGER NOT NULL)")
+            db.executemany("INSERT OR IGNORE INTO counters VALUES (?, 0)", [("hits",), ("misses",)])
+    
+    def _connect(self):
+        return closing_connection(sqlite3.connect(self.path, timeout=10))
+    
+    @staticmethod
+    def make_key(model_id, fingerprint, prompt):
+        """Canonical hash of what determines a response: model, agent configuration and prompt"""
+        canonical = json.dumps({"model": model_id, "agent": fingerprint, "prompt": prompt.strip()}, sort_keys=True)
+        return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+    
+    def get(self, key):
+        now = time.time()
+        with self._connect() as db:
+            row = db.execute(
+                "SELECT content FROM responses WHERE key = ? AND created_at >= ?",
+                (key, now - self.ttl_seconds)
+            ).fetchone()
+            if row is not None:
+                db.execute("UPDATE responses SET last_used = ? WHERE key = ?", (now, key))
+            db.execute("UPDATE counters SET value = value + 1 WHERE name = ?", ("hits" if row else "misses",))
+        return row[0] if row else None
+    
+    def put(self, key, content):
+        now = time.time()
+        with self._connect() as db:
+            db.execute("INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?)", (key, content, now, now))
+            db.execute("DELETE FROM responses WHERE created_at < ?", (now - self.ttl_seconds,))
+            db.execute(
+                "DELETE FROM responses WHERE key IN ("
+                "SELECT key FROM responses ORDER BY last_used DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,)
+            )
+    
+    def clear(self):
+        with self._connect() as db:
+            db.execute("DELETE FROM responses")
+            db.execute("UPDATE counters SET value = 0")
+    
+    def stats(self):
+        with self._connect() as db:
+            entries = db.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+            counters = dict(db.execute("SELECT name, value FROM counters").fetchall())
+        lookups = counters["hits"] + counters["misses"]
+        return {
+            "entries": entries,
+            "hits": counters["hits"],
+            "misses": counters["misses"],
+            "hit_rate": counters["hits"] / lookups if lookups else None,
+        }
+
+@contextmanager
+def closing_connection(connection):
+    """Commit (or roll back) and close an sqlite3 connection"""
+    try:
+        with connection:
+            yield connection
+    finally:
+        connection.close()
+
+@st.cache_resource(show_spinner=False)
+def load_llm_cache():
+    return LLMResponseCache(LLM_CACHE_PATH, LLM_CACHE_TTL_SECONDS, LLM_CACHE_MAX_ENTRIES)
+
+def show_llm_cache_stats():
+    """Sidebar panel with the response cache toggle and hit rate"""
+    with st.expander("AI Response Cache"):
+        st.checkbox(
+            "Reuse cached AI responses",
+            value=True,
+            key="use_llm_cache",
+            help="Identical requests are answered from a local cache instead of calling the model again"
+        )
+        cache = load_llm_cache()
+        stats = cache.stats()
+        col1, col2 = st.columns(2)
+        col1.metric("Hit Rate", f"{stats['hit_rate']:.0%}" if stats["hit_rate"] is not None else "–")
+        col2.metric("Entries", stats["entries"])
+        st.caption(f"{stats['hits']} hits, {stats['misses']} misses")
+        if st.button("Clear Response Cache"):
+            cache.clear()
+            st.rerun()
+
+class AgentPool:
+    """Agents sharing one model and configuration, reused by every session of this process.
+    
+    All agents share a single Gemini model, so its client and HTTP connection pool
+    are created once. An agno Agent keeps state for the run in progress, so each
+    run checks out an agent of its own and a new one is built only when all are busy.
+    """
+    
+    def __init__(self, model_id, config, fingerprint=None, cache=None):
+        self.model_id = model_id
+        self.config = config
+        self.fingerprint = fingerprint
+        self.cache = cache
+        start = time.perf_counter()
+        self.model = Gemini(id=model_id)
+        self.model_build_seconds = time.perf_counter() - start
+        self.builds = 0
+        self.build_seconds = 0.0
+        self.runs = 0
+        self.warm_runs = 0
+        self.streams = 0
+        self.first_token_seconds = 0.0
+        self._lock = threading.Lock()
+        self._idle = queue.LifoQueue()
+    
+    def _build(self):
+        start = time.perf_counter()
+        agent = Agent(
+            model=self.model,
+            tools=[],
+            **self.config,
+            add_datetime_to_instructions=True,
+            show_tool_calls=True,
+            markdown=True,
+        )
+        with self._lock:
+            self.builds += 1
+            self.build_seconds += time.perf_counter() - start
+        return agent
+    
+    @contextmanager
+    def checkout(self):
+        """Borrow an idle agent (or a new one) for one run"""
+        try:
+            agent = self._idle.get_nowait()
+        except queue.Empty:
+            agent = self._build()
+        # The model client is created on first use; later runs reuse its connections
+        warm = getattr(self.model, "client", None) is not None
+        try:
+            yield agent
+        finally:
+            # Runs are independent: don't let one session's messages pile up in the next
+            if agent.memory is not None:
+                agent.memory.clear()
+            with self._lock:
+                self.runs += 1
+                self.warm_runs += warm
+            self._idle.put(agent)
+    
+    def run(self, prompt, use_cache=True, cache_if=None, **kwargs):
+        """Run the prompt on an agent, answering from the response cache when allowed.
+        
+        A fresh response is cached only if cache_if(content) is true (default: non-empty).
+        """
+        key = self.cache.make_key(self.model_id, self.fingerprint, prompt) if self.cache else None
+        if key and use_cache:
+            content = self.cache.get(key)
+            if content is not None:
+                return CachedResponse(content)
+        with self.checkout() as agent:
+            response = agent.run(prompt, **kwargs)
+        if key and response.content and (cache_if is None or cache_if(response.content)):
+            self.cache.put(key, response.content)
+        return response
+    
+    def stream(self, prompt, use_cache=True, cache_if=None):
+        """Like run(), but yield the response text in chunks as the model produces them"""
+        key = self.cache.make_key(self.model_id, self.fingerprint, prompt) if self.cache else None
+        if key and use_cache:
+            content = self.cache.get(key)
+            if content is not None:
+                yield content
+                return
+        chunks = []
+        started_at = time.perf_counter()
+        with self.checkout() as agent:
+            for response in agent.run(prompt, stream=True):
+                if not isinstance(response.content, str) or not response.content:
+                    continue
+                if not chunks:
+                    with self._lock:
+                        self.streams += 1
+                        self.first_token_seconds += time.perf_counter() - started_at
+                chunks.append(response.content)
+                yield response.content
+        content = "".join(chunks)
+        if key and content and (cache_if is None or cache_if(content)):
+            self.cache.put(key, content)
+    
+    def stats(self):
+        with self._lock:
+            return {
+                "model": self.model_id,
+                "model_build_ms": round(self.model_build_seconds * 1000, 2),
+                "agents_built": self.builds,
+                "agent_build_ms_avg": round(self.build_seconds / self.builds * 1000, 2) if self.builds else None,
+                "runs": self.runs,
+                "runs_reusing_client": self.warm_runs,
+                "first_token_ms_avg": round(self.first_token_seconds / self.streams * 1000, 2) if self.streams else None,
+            }
+
+def agent_fingerprint(model_id, config):
+    """Hash of everything an agent is built from; a change yields a new pool"""
+    canonical = json.dumps({"model": model_id, **config}, sort_keys=True)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+@st.cache_resource(show_spinner=False)
+def load_agent_pool(name, model_id, fingerprint):
+    """Process-wide agent pool for one agent configuration (see AGENT_CONFIGS)"""
+    return AgentPool(model_id, AGENT_CONFIGS[name], fingerprint, load_llm_cache())
+
+def cached_agent(name):
+    config = AGENT_CONFIGS[name]
+    return load_agent_pool(name, GEMINI_MODEL_ID, agent_fingerprint(GEMINI_MODEL_ID, config))
+
+def reset_agents():
+    """Drop every cached agent; the next run builds fresh ones"""
+    load_agent_pool.clear()
+
+def show_agent_stats():
+    """Sidebar panel with agent construction times and client reuse"""
+    with st.expander("AI Agents"):
+        for name in AGENT_CONFIGS:
+            st.caption(name)
+            st.json(cached_agent(name).stats())
+        if st.button("Rebuild Agents"):
+            reset_agents()
+            st.rerun()
+
 # Initialize the agent
 def get_agent():
-    return Agent(
-        model=Gemini(id="gemini-2.0-flash-exp"),
-        tools=[],
-        description="You are an expert resume optimizer with deep knowledge of various industries and job requirements.",
-        instructions="""
-        # Resume Enhancement Process
-        
-        ## Analysis Phase
-        1. Analyze the provided job description thoroughly
-           - Extract key requirements, skills, and qualifications
-           - Identify industry-specific terminology and buzzwords
-           - Note preferred experience levels and education requirements
-           
-        2. Evaluate the current resume (payload) against job requirements
-           - Identify strengths that already align with the job description
-           - Spot gaps and improvement opportunities
-           - Determine which sections need enhancement
-        
-        ## Enhancement Phase  
-        3. Modify the resume content to improve job alignment while preserving core facts:
-           - Rephrase experience descriptions using industry-relevant terminology
-           - Highlight transferable skills that match job requirements
-           - Restructure accomplishments to demonstrate relevant outcomes
-           - Ensure all modifications maintain factual accuracy of:
-             * Educational background and institutions
-             * Certification names and credentials
-             * Employment history timeline and company names
-             * Core technical skills and technologies
-        
-        4. DO NOT fabricate or add:
-           - New jobs or positions not in original payload
-           - Skills or technologies not listed in original payload
-           - Educational degrees or certifications not listed in original payload
-           - Projects that don't exist in the original payload
-        
-        ## Scoring and Reporting
-        5. Score the original resume against the job description
-        6. Score the enhanced resume against the job description
-        7. Provide a detailed comparison showing improvements
-        
-        ## Important Guidelines
-        - Focus on professional enhancement through better wording, not factual changes
-        - Maintain the person's actual career trajectory and capabilities
-        - Use industry-standard terminology appropriate for the target position
-        - Eliminate irrelevant content that doesn't support the job application
-        - Fix grammatical errors and improve overall professional tone
-        """,
-        expected_output="""
-        # Resume Enhancement Report
-        
-        ## Job Description Analysis
-        {Summary of key requirements and skills from the job description}
-        
-        ## Original Resume Assessment
-        {Brief evaluation of original resume's alignment with job requirements}
-        
-        ## Enhanced Resume Payload
-        ```json
-        {Complete enhanced JSON payload with all optimized fields}
-        ```
-        
-        ## Improvement Summary
-        - Experience Descriptions: {Specific improvements made}
-        - Skills Presentation: {How skills were better aligned}
-        - Project Descriptions: {How projects were reframed to match requirements}
-        - Overall Language Enhancement: {Terminology improvements}
-        
-        ## Scoring Comparison
-        | Category | Original Score | Enhanced Score | Improvement |
-        |----------|---------------|----------------|-------------|
-        | Relevant Experience | {score}/100 | {score}/100 | +{points} |
-        | Skills Match | {score}/100 | {score}/100 | +{points} |
-        | Education & Certs | {score}/100 | {score}/100 | +{points} |
-        | Overall Fit | {score}/100 | {score}/100 | +{points} |
-        
-        ## Overall Match Percentage: {Original score}% → {Enhanced score}%
-        
-        ## Key Improvements Made
-        1. {First major improvement}
-        2. {Second major improvement}
-        3. {Third major improvement}
-        
-        ## Unchanged Elements (Core Facts Preserved)
-        - All employment history dates and company names
-        - Educational credentials and institutions
-        - Certification titles
-        - Core technical skills
-        """,
-        add_datetime_to_instructions=True,
-        show_tool_calls=True,
-        markdown=True,
-    )
+    return cached_agent("optimizer")
 
 # Define the Flask API endpoint
 API_URL = "http://localhost:5000/generate_resume"
+# Async job endpoint of the same service (submit, then poll for the PDF)
+JOBS_URL = API_URL.rsplit("/", 1)[0] + "/jobs"
+PDF_JOB_TIMEOUT = 180  # Seconds to wait for a queued compile to finish
+
+def generate_pdf_via_job(payload, status_placeholder=None):
+    """Submit a PDF generation job and poll until it finishes.
+
+    Returns the final HTTP response: the PDF on success, or the error response
+    (e.g. 429 with Retry-After when the server queue is full).
+    """
+    base_url = API_URL.rsplit("/", 1)[0]
+    submit_response = requests.post(JOBS_URL, json=payload, timeout=10)
+    if submit_response.status_code != 202:
+        return submit_response
+
+    status_url = base_url + submit_response.json()["status_url"]
+    deadline = time.monotonic() + PDF_JOB_TIMEOUT
+    while time.monotonic() < deadline:
+        status_response = requests.get(status_url, timeout=10)
+        if status_response.status_code != 200:
+            return status_response
+        job = status_response.json()
+        if status_placeholder is not None:
+            status_placeholder.info(f"PDF job {job['status']} ({job['stage']})...")
+        if job["status"] in ("done", "failed"):
+            return requests.get(status_url + "/pdf", timeout=30)
+        time.sleep(0.5)
+    # Give up and tell the server to kill the compile instead of leaving it running
+    try:
+        requests.delete(status_url, timeout=5)
+    except requests.exceptions.RequestException:
+        pass
+    raise requests.exceptions.Timeout(f"PDF job did not finish within {PDF_JOB_TIMEOUT} seconds")
+
+def parse_server_timing(header):
+    """Turn a Server-Timing header into rows of {stage, milliseconds}"""
+    rows = []
+    for metric in filter(None, (part.strip() for part in header.split(","))):
+        name, _, params = metric.partition(";")
+        duration = params.partition("dur=")[2]
+        try:
+            rows.append({"stage": name.strip(), "milliseconds": float(duration)})
+        except ValueError:
+            continue
+    return rows
 
 # Function to extract text from PDF
 def extract_text_from_pdf(uploaded_file):
-    """Extracts text from PDF using PyMuPDF (fitz)"""
+    """Extracts text from PDF using PyMuPDF (fitz); accepts an uploaded file or PDF bytes"""
     extracted_text = ""
     
     # Read file as a BytesIO stream
-    pdf_stream = io.BytesIO(uploaded_file.read())  
+    pdf_bytes = uploaded_file if isinstance(uploaded_file, bytes) else uploaded_file.read()
+    pdf_stream = io.BytesIO(pdf_bytes)
     doc = fitz.open("pdf", pdf_stream)  # Open PDF from memory
 
     for page_num in range(len(doc)):
@@ -460,6 +774,89 @@ def add_skills_section():
                 st.session_state.skills_data[category].append("")
                 st.rerun()
 
+class StreamingReport:
+    """Markdown report assembled from streamed chunks.
+    
+    The first ```json block is parsed the moment its closing fence arrives, so the
+    payload can be used while the rest of the report is still being generated.
+    """
+    
+    def __init__(self):
+        self.text = ""
+        self.started_at = time.perf_counter()
+        self.first_token_seconds = None
+        self.payload = None
+        self.payload_seconds = None
+        self.total_seconds = None
+        self._json_start = None
+        self._scan_from = 0
+        self._json_done = False
+    
+    def feed(self, chunk):
+        """Append a chunk; returns True when it completed the JSON payload"""
+        if not chunk:
+            return False
+        if self.first_token_seconds is None:
+            self.first_token_seconds = time.perf_counter() - self.started_at
+        self.text += chunk
+        return self._scan_json()
+    
+    def _scan_json(self):
+        # Only look at new text (plus enough overlap for a fence split across chunks)
+        if self._json_done:
+            return False
+        if self._json_start is None:
+            start = self.text.find("```json", max(0, self._scan_from - 6))
+            if start == -1:
+                self._scan_from = len(self.text)
+                return False
+            self._json_start = self._scan_from = start + 7
+        end = self.text.find("```", max(self._json_start, self._scan_from - 2))
+        if end == -1:
+            self._scan_from = len(self.text)
+            return False
+        self._json_done = True
+        try:
+            self.payload = json.loads(self.text[self._json_start:end].strip())
+        except json.JSONDecodeError:
+            return False
+        self.payload_seconds = time.perf_counter() - self.started_at
+        return True
+    
+    def finish(self):
+        self.total_seconds = time.perf_counter() - self.started_at
+        return self
+    
+    def timings(self):
+        """Time to first token, to the payload and in total, in seconds"""
+        return {
+            "first_token_s": round(self.first_token_seconds, 2) if self.first_token_seconds is not None else None,
+            "payload_s": round(self.payload_seconds, 2) if self.payload_seconds is not None else None,
+            "total_s": round(self.total_seconds, 2) if self.total_seconds is not None else None,
+        }
+
+STREAM_RENDER_INTERVAL = 0.15  # Seconds between markdown redraws while streaming
+
+def render_stream(chunks, placeholder, on_payload=None, on_chunk=None):
+    """Draw streamed markdown into placeholder as it arrives and return the StreamingReport.
+    
+    on_payload(report) is called as soon as the report's JSON payload is complete,
+    on_chunk(report) after every chunk.
+    """
+    report = StreamingReport()
+    rendered_at = 0.0
+    for chunk in chunks:
+        if report.feed(chunk) and on_payload is not None:
+            on_payload(report)
+        if on_chunk is not None:
+            on_chunk(report)
+        # Redrawing a long report on every token is slow; throttle it
+        if time.perf_counter() - rendered_at >= STREAM_RENDER_INTERVAL:
+            placeholder.markdown(report.text + "▌")
+            rendered_at = time.perf_counter()
+    placeholder.markdown(report.text)
+    return report.finish()
+
 def extract_json_payload(response_text):
     """Extract the JSON payload from the agent response"""
     # Find the start and end of the JSON payload in the markdown content
@@ -493,39 +890,399 @@ def extract_overall_score(response_text):
     
     return None, None
 
+# Configuration of the ATS scoring agent
+ATS_AGENT_CONFIG = dict(
+    description="You are an expert resume scorer with deep knowledge of various industries and job requirements.",
+    instructions="""
+    - Analyze the provided job description
+    - Evaluate the resume against the job requirements
+    - Provide a detailed scoring breakdown
+    - Calculate an overall match percentage
+    """,
+    expected_output="""
+    # Resume Scoring Report
+
+    ## Job Description Analysis
+    {Key requirements and skills from the job description}
+
+    ## Resume Evaluation
+    {Detailed analysis of how the resume matches the job requirements}
+
+    ## Scoring Breakdown
+    - Relevant Experience: {score}/100
+    - Skills Match: {score}/100
+    - Education: {score}/100
+    - Overall Fit: {score}/100
+
+    ## Overall Match Percentage: {total_score}%
+    """,
+)
+
+AGENT_CONFIGS = {
+    "optimizer": OPTIMIZER_AGENT_CONFIG,
+    "ats": ATS_AGENT_CONFIG,
+}
+
+def extract_ats_score(response_text):
+    """Extract the overall match percentage from an ATS scoring report"""
+    match = re.search(r"Overall Match Percentage: (\d+)%", response_text)
+    return int(match.group(1)) if match else None
+
 def get_ats_agent():
-    """Create an ATS scoring agent"""
-    return Agent(
-        model=Gemini(id="gemini-2.0-flash-exp"),
-        tools=[],
-        description="You are an expert resume scorer with deep knowledge of various industries and job requirements.",
-        instructions="""
-        - Analyze the provided job description
-        - Evaluate the resume against the job requirements
-        - Provide a detailed scoring breakdown
-        - Calculate an overall match percentage
-        """,
-        expected_output="""
-        # Resume Scoring Report
-
-        ## Job Description Analysis
-        {Key requirements and skills from the job description}
-
-        ## Resume Evaluation
-        {Detailed analysis of how the resume matches the job requirements}
-
-        ## Scoring Breakdown
-        - Relevant Experience: {score}/100
-        - Skills Match: {score}/100
-        - Education: {score}/100
-        - Overall Fit: {score}/100
-
-        ## Overall Match Percentage: {total_score}%
-        """,
-        add_datetime_to_instructions=True,
-        show_tool_calls=True,
-        markdown=True,
+    """Get the shared ATS scoring agent"""
+    return cached_agent("ats")
+
+# Local ATS scorer: BM25-weighted keyword matching of the job description against
+# the resume sections, computed with NumPy in milliseconds and fully reproducible.
+ATS_TOKEN_PATTERN = re.compile(r"[a-z0-9][a-z0-9+#]*(?:\.[a-z0-9]+)*")
+# Sentence breaks in a job description; a period only ends a sentence before whitespace,
+# so terms like "node.js" and "b.tech" stay whole
+ATS_SENTENCE_PATTERN = re.compile(r"[\n;]|\.(?:\s|$)")
+ATS_STOPWORDS = frozenset("""
+a about above after all also an and any are as at be been being both but by can could do does
+during each etc for from had has have having he her his how i if in into is it its just may
+me more most must my no not of on or other our ours out over own per same she should so some
+such than that the their them then there these they this those through to too under until up
+us very via was we were what when where which while who whom why will with within would you your
+ability able across candidate candidates company experience good great ideal including job
+join knowledge looking new plus preferred required requirement requirements responsibilities
+responsible role strong team teams understanding using well work working year years
+""".split())
+# Words that mark the education requirements of a job description
+ATS_EDUCATION_TERMS = frozenset("""
+bachelor bachelors b.tech b.e b.sc bsc btech degree diploma doctorate graduate graduation
+m.tech m.sc master masters msc mtech mba phd postgraduate undergraduate university
+""".split())
+# Section headings recognised in plain resume text (e.g. extracted from a PDF)
+ATS_SECTION_HEADINGS = {
+    "experience": ("experience", "employment", "work history"),
+    "projects": ("project",),
+    "skills": ("skill", "technologies", "tech stack"),
+    "education": ("education", "academic"),
+    "certifications": ("certification", "achievement", "award"),
+}
+# BM25 term-frequency saturation: a term mentioned once counts 1 / (1 + k1) of a full
+# match, and each further mention adds less
+ATS_BM25_K1 = 0.5
+# Share of a category's coverage that comes from matching the job's two-word phrases
+ATS_PHRASE_SHARE = 0.2
+# Weighted keyword coverage at which a category scores 100 (a term mentioned once
+# covers 1 / (1 + ATS_BM25_K1) of its weight)
+ATS_FULL_COVERAGE = {
+    "Relevant Experience": 0.4,
+    "Skills Match": 0.27,
+    "Education": 0.4,
+    "Overall Fit": 0.47,
+}
+# Share of each category in the overall match percentage
+ATS_CATEGORY_WEIGHTS = {
+    "Relevant Experience": 0.35,
+    "Skills Match": 0.35,
+    "Education": 0.1,
+    "Overall Fit": 0.2,
+}
+
+def ats_tokens(text):
+    """Lowercase word tokens without stopwords, with plurals folded ("APIs" -> "api")"""
+    tokens = []
+    for token in ATS_TOKEN_PATTERN.findall(text.lower()):
+        if token in ATS_STOPWORDS or len(token) < 2 or not re.search(r"[a-z]", token):
+            continue
+        if len(token) > 4 and token.endswith("ies"):
+            token = token[:-3] + "y"
+        elif len(token) > 3 and token.endswith("s") and not token.endswith("ss"):
+            token = token[:-1]
+        tokens.append(token)
+    return tokens
+
+def ats_terms(text):
+    """Unigram and bigram counts of a text; bigrams never span a line break"""
+    terms = Counter()
+    for line in text.splitlines():
+        tokens = ats_tokens(line)
+        terms.update(tokens)
+        terms.update(f"{first} {second}" for first, second in zip(tokens, tokens[1:]))
+    return terms
+
+def flatten_text(value):
+    """All string values of a (nested) payload, one per line"""
+    if isinstance(value, dict):
+        return "\n".join(flatten_text(item) for item in value.values())
+    if isinstance(value, (list, tuple)):
+        return "\n".join(flatten_text(item) for item in value)
+    return str(value) if value else ""
+
+def resume_sections(resume):
+    """Split a resume payload (dict) or plain resume text into named sections"""
+    if isinstance(resume, dict):
+        skills = resume.get("skills_data") or {}
+        return {
+            "summary": flatten_text([resume.get("Designation"), resume.get("summary")]),
+            "experience": flatten_text(resume.get("experience")),
+            "projects": flatten_text(resume.get("projects")),
+            "skills": flatten_text([list(skills.keys()), list(skills.values())] if isinstance(skills, dict) else skills),
+            "education": flatten_text(resume.get("education")),
+            "certifications": flatten_text([resume.get("certifications"), resume.get("achievements")]),
+        }
+    
+    sections = {"summary": []}
+    current = "summary"
+    for line in str(resume).splitlines():
+        heading = line.strip().lower()
+        if 0 < len(heading) <= 40:
+            for name, keywords in ATS_SECTION_HEADINGS.items():
+                if any(keyword in heading for keyword in keywords):
+                    current = name
+                    break
+            else:
+                sections.setdefault(current, []).append(line)
+            continue
+        sections.setdefault(current, []).append(line)
+    return {name: "\n".join(lines) for name, lines in sections.items()}
+
+def score_ats_locally(job_description, resume):
+    """Score a resume against a job description without calling a model.
+    
+    Job description terms are weighted by log term frequency times their BM25 IDF
+    over the job description's sentences, a corpus that does not depend on the
+    resume. Each category scores the weighted share of the job's words its section
+    text matches, blended with the weighted share of the job's phrases (bigrams),
+    using BM25 term-frequency saturation without length normalisation. Adding a job
+    keyword to a resume therefore can only raise its scores. Returns the category
+    scores, the overall percentage and matched/missing keywords.
+    """
+    started_at = time.perf_counter()
+    sections = resume_sections(resume)
+    category_texts = {
+        "Relevant Experience": sections.get("experience", "") + "\n" + sections.get("projects", ""),
+        "Skills Match": sections.get("skills", "") + "\n" + sections.get("certifications", ""),
+        "Education": sections.get("education", "") + "\n" + sections.get("certifications", ""),
+        "Overall Fit": "\n".join(sections.values()),
+    }
+    if isinstance(resume, str) and not any(sections.get(name) for name in ("experience", "skills", "education")):
+        # Plain text without recognisable headings: every category sees the whole resume
+        category_texts = {category: category_texts["Overall Fit"] for category in category_texts}
+    
+    query = ats_terms(job_description)
+    terms = list(query)
+    docs = [ats_terms(text) for text in category_texts.values()]
+    
+    # BM25 IDF of each job term over the job description's own sentences: terms that
+    # run through the whole posting weigh less than the ones a requirement names
+    sentence_docs = [set(ats_terms(sentence)) for sentence in ATS_SENTENCE_PATTERN.split(job_description)]
+    sentence_docs = [doc for doc in sentence_docs if doc] or [set()]
+    df = np.array([sum(term in doc for doc in sentence_docs) for term in terms], dtype=float)
+    idf = np.log1p((len(sentence_docs) - df + 0.5) / (df + 0.5))
+    weights = (1 + np.log(np.array([query[term] for term in terms], dtype=float))) * idf if terms else np.zeros(0)
+    
+    # BM25 saturation of each term's frequency per category document, scaled to [0, 1)
+    tf = np.array([[doc.get(term, 0) for term in terms] for doc in docs], dtype=float).reshape(len(docs), len(terms))
+    matches = tf / (tf + ATS_BM25_K1)
+    
+    # Education is judged only on the job description's education sentences, if any
+    education_sentences = [sentence for sentence in ATS_SENTENCE_PATTERN.split(job_description)
+                           if ATS_EDUCATION_TERMS & set(ATS_TOKEN_PATTERN.findall(sentence.lower()))]
+    education_terms = set(ats_terms("\n".join(education_sentences)))
+    education_mask = np.array([term in education_terms for term in terms], dtype=bool)
+    
+    categories = {}
+    unigram_mask = np.array([" " not in term for term in terms], dtype=bool)
+    for row, category in enumerate(category_texts):
+        category_weights = weights * education_mask if category == "Education" else weights
+        word_weights = category_weights * unigram_mask
+        phrase_weights = category_weights * ~unigram_mask
+        if word_weights.sum() > 0:
+            coverage = float(matches[row] @ word_weights / word_weights.sum())
+            if phrase_weights.sum() > 0:
+                phrase_coverage = float(matches[row] @ phrase_weights / phrase_weights.sum())
+                coverage = (1 - ATS_PHRASE_SHARE) * coverage + ATS_PHRASE_SHARE * phrase_coverage
+            categories[category] = int(round(min(1.0, coverage / ATS_FULL_COVERAGE[category]) * 100))
+        elif category == "Education":
+            # No stated education requirement: any listed education satisfies it
+            categories[category] = 100 if sections.get("education", "").strip() else 50
+        else:
+            categories[category] = 0
+    overall = int(round(sum(categories[category] * weight for category, weight in ATS_CATEGORY_WEIGHTS.items())))
+    
+    # Most important single-word keywords, split by whether the resume has them
+    overall_row = list(category_texts).index("Overall Fit")
+    ranked = [index for index in np.argsort(-weights, kind="stable") if " " not in terms[index]]
+    return {
+        "categories": categories,
+        "overall": overall,
+        "matched": [terms[index] for index in ranked if matches[overall_row, index]][:15],
+        "missing": [terms[index] for index in ranked if not matches[overall_row, index]][:15],
+        "seconds": time.perf_counter() - started_at,
+    }
+
+def ats_monotonicity_violations(job_description, resume):
+    """Job keywords whose addition to the resume lowered a score.
+    
+    Each top keyword, matched or missing, is added to the resume's summary and, for a
+    payload, to its skills; any category or overall score that drops as a result is
+    reported as a (keyword, category) pair. A correct scorer returns an empty list.
+    """
+    baseline = score_ats_locally(job_description, resume)
+    violations = []
+    for keyword in baseline["matched"] + baseline["missing"]:
+        if isinstance(resume, dict):
+            skills = resume.get("skills_data")
+            variants = [dict(resume, summary=f"{resume.get('summary') or ''} {keyword}")]
+            if isinstance(skills, dict):
+                variants.append(dict(resume, skills_data=dict(skills, Keywords=[keyword])))
+        else:
+            variants = [f"{resume} {keyword}"]
+        for variant in variants:
+            result = score_ats_locally(job_description, variant)
+            violations.extend((keyword, category) for category, score in result["categories"].items()
+                              if score < baseline["categories"][category])
+            if result["overall"] < baseline["overall"]:
+                violations.append((keyword, "Overall"))
+    return violations
+
+def format_ats_report(result):
+    """Markdown report in the same layout as the ATS agent's"""
+    breakdown = "\n".join(f"- {category}: {score}/100" for category, score in result["categories"].items())
+    return f"""# Resume Scoring Report
+
+## Job Description Analysis
+Key terms: {", ".join(result["matched"][:8] + result["missing"][:8]) or "none found"}
+
+## Resume Evaluation
+- Matched keywords: {", ".join(result["matched"]) or "none"}
+- Missing keywords: {", ".join(result["missing"]) or "none"}
+
+## Scoring Breakdown
+{breakdown}
+
+## Overall Match Percentage: {result["overall"]}%
+
+_Scored locally by keyword matching in {result["seconds"] * 1000:.1f} ms._
+"""
+
+ATS_MODES = ["Fast (local)", "Deep (AI)"]
+
+def run_ats_check(job_description, label, resume, deep=False, ats_agent=None, placeholder=None, use_cache=True,
+                  on_report=None):
+    """Score a resume (payload dict or text); returns the report markdown.
+    
+    Fast mode uses score_ats_locally(). Deep mode asks the ATS agent, streaming its
+    report into placeholder when one is given; on_report(report) then receives the
+    finished StreamingReport (for its timings).
+    """
+    if not deep:
+        return format_ats_report(score_ats_locally(job_description, resume))
+    ats_agent = ats_agent or get_ats_agent()
+    prompt = ats_prompt(job_description, label, json.dumps(resume) if isinstance(resume, dict) else resume)
+    chunks = ats_agent.stream(
+        prompt,
+        use_cache=use_cache,
+        cache_if=lambda content: extract_ats_score(content) is not None
     )
+    if placeholder is None:
+        return "".join(chunks)
+    report = render_stream(chunks, placeholder)
+    if on_report is not None:
+        on_report(report)
+    return report.text
+
+# Worker threads for the steps of an optimization that can run side by side.
+# Tasks on this pool only compute and call the PDF service; every st.* call stays
+# on the script thread (see OptimizePipeline.poll).
+PIPELINE_WORKERS = 4
+
+@st.cache_resource(show_spinner=False)
+def load_pipeline_pool():
+    return ThreadPoolExecutor(max_workers=PIPELINE_WORKERS, thread_name_prefix="pipeline")
+
+def ats_prompt(job_description, label, resume):
+    return f"""
+    Job Description: {job_description}
+
+    {label}: {resume}
+
+    Please score this resume against the job description.
+    """
+
+def score_resume(job_description, label, resume, deep=False, ats_agent=None, use_cache=True):
+    """Worker step: ATS-score a resume; returns (score or None, report)"""
+    report = run_ats_check(job_description, label, resume, deep, ats_agent, use_cache=use_cache)
+    return extract_ats_score(report), report
+
+def score_pdf(job_description, pdf_content, deep=False, ats_agent=None, use_cache=True):
+    """Worker step: ATS-score the text of a generated PDF"""
+    pdf_text = extract_text_from_pdf(pdf_content)
+    return score_resume(job_description, "Resume Text", pdf_text, deep, ats_agent, use_cache)
+
+def format_score(score):
+    return f"{score}%" if score is not None else "not found in the report"
+
+def pdf_field_errors(api_response):
+    """Per-field validation errors of a 400 from the PDF service, if it sent any"""
+    if api_response.status_code != 400:
+        return []
+    try:
+        body = api_response.json()
+    except ValueError:
+        return []
+    return body.get("fields", []) if isinstance(body, dict) else []
+
+def pdf_error_message(api_response):
+    """Markdown explanation of a failed PDF service response"""
+    if api_response.status_code == 429:
+        retry_after = api_response.headers.get("Retry-After", "a few")
+        return f"The PDF service is busy. Please try again in {retry_after} seconds."
+    fields = pdf_field_errors(api_response)
+    if fields:
+        # The service rejected the payload before compiling; show which fields
+        return "The resume data is incomplete or malformed:\n" + "\n".join(
+            f"- `{field_error['field']}`: {field_error['message']}" for field_error in fields
+        )
+    return f"Error generating PDF: Status code {api_response.status_code}"
+
+class OptimizePipeline:
+    """Runs independent steps of one optimization concurrently on the pipeline pool.
+    
+    Each step has a placeholder. When a step finishes, poll() (called from the script
+    thread) hands its result to on_done, which may draw it and submit follow-up steps.
+    """
+    
+    def __init__(self, pool):
+        self.pool = pool
+        self.started_at = time.perf_counter()
+        self.timings = {}
+        self._steps = []
+    
+    def _timed(self, fn, args):
+        result = fn(*args)
+        return result, time.perf_counter() - self.started_at
+    
+    def submit(self, name, label, placeholder, on_done, fn, *args):
+        placeholder.info(f"{label}...")
+        future = self.pool.submit(self._timed, fn, args)
+        self._steps.append((name, label, placeholder, on_done, future))
+    
+    def poll(self, report=None):
+        """Show every step that has finished since the last call"""
+        for step in [step for step in self._steps if step[4].done()]:
+            self._steps.remove(step)
+            name, label, placeholder, on_done, future = step
+            try:
+                result, finished_at = future.result()
+            except Exception as e:
+                self.timings[name] = round(time.perf_counter() - self.started_at, 2)
+                placeholder.error(f"{label} failed: {e}")
+                continue
+            self.timings[name] = round(finished_at, 2)
+            on_done(result, placeholder)
+    
+    def wait(self):
+        """Poll until every step, including follow-ups, has finished"""
+        while self._steps:
+            self.poll()
+            time.sleep(0.1)
+        self.timings["end_to_end"] = round(time.perf_counter() - self.started_at, 2)
+        return self.timings
 
 # Initialize session state for file upload
 if 'uploaded_resume' not in st.session_state:
@@ -595,6 +1352,23 @@ def main():
             step=5,
             help="Set your target matching score against the job description"
         )
+        
+        # Shared with the ATS checks, which read them from the session
+        st.session_state.job_description = job_description
+        st.session_state.expected_score = expected_score
+        
+        st.radio(
+            "ATS Scoring",
+            ATS_MODES,
+            key="ats_mode",
+            help="Fast scores keywords locally in milliseconds; Deep asks the AI for a detailed review"
+        )
+        
+        show_agent_stats()
+        show_llm_cache_stats()
+    
+    # ATS check of the resume as currently entered
+    add_ats_scoring_tab()
     
     # Tabs for different resume sections
     tab1, tab2, tab3, tab4, tab5, tab6 = st.tabs([
@@ -734,18 +1508,82 @@ def main():
                 I'm aiming for a match score of at least {expected_score}%.
                 """
                 
-                # Run the agent
+                use_cache = st.session_state.get("use_llm_cache", True)
+                
+                # With the full pipeline, scoring the current resume runs alongside the
+                # optimization, and the PDF is generated (then scored) once the payload exists
+                pipeline = None
+                if st.session_state.get("auto_generate_pdf", True):
+                    # Results of an earlier optimization no longer apply
+                    for key in ("original_ats_score", "original_ats_report", "generated_pdf_content",
+                                "pdf_ats_score", "pdf_ats_score_response", "checking_ats_score"):
+                        st.session_state.pop(key, None)
+                    pipeline = OptimizePipeline(load_pipeline_pool())
+                    deep_ats = st.session_state.get("ats_mode") == ATS_MODES[1]
+                    ats_agent = get_ats_agent() if deep_ats else None
+                    
+                    def original_scored(result, placeholder):
+                        st.session_state.original_ats_score, st.session_state.original_ats_report = result
+                        placeholder.success(f"Current resume ATS score: {format_score(result[0])}")
+                    
+                    def pdf_scored(result, placeholder):
+                        st.session_state.pdf_ats_score, st.session_state.pdf_ats_score_response = result
+                        st.session_state.checking_ats_score = True
+                        placeholder.success(f"Optimized PDF ATS score: {format_score(result[0])}")
+                    
+                    def pdf_generated(api_response, placeholder):
+                        if api_response.status_code != 200:
+                            placeholder.warning(pdf_error_message(api_response))
+                            return
+                        st.session_state.generated_pdf_content = api_response.content
+                        st.session_state.show_ats_score_button = True
+                        placeholder.success("Optimized resume PDF generated.")
+                        pipeline.submit("pdf_score", "Scoring the optimized PDF", st.empty(), pdf_scored,
+                                        score_pdf, job_description, api_response.content, deep_ats, ats_agent,
+                                        use_cache)
+                    
+                    pipeline.submit("original_score", "Scoring your current resume", st.empty(), original_scored,
+                                    score_resume, job_description, "Resume Payload", original_payload, deep_ats,
+                                    ats_agent, use_cache)
+                    pdf_placeholder = st.empty()
+                
+                # Stream the report as it is written; the payload is usable once its block closes
+                payload_status = st.empty()
+                
+                def payload_ready(report):
+                    st.session_state.optimized_payload = report.payload
+                    payload_status.success(
+                        f"Optimized resume data ready after {report.payload_seconds:.1f}s, finishing the report..."
+                    )
+                    if pipeline is not None:
+                        pipeline.submit("pdf", "Generating the optimized PDF", pdf_placeholder, pdf_generated,
+                                        generate_pdf_via_job, report.payload)
+                
                 agent = get_agent()
-                response = agent.run(prompt)
+                report = render_stream(
+                    agent.stream(
+                        prompt,
+                        use_cache=use_cache,
+                        cache_if=lambda content: extract_json_payload(content) is not None
+                    ),
+                    st.empty(),
+                    on_payload=payload_ready,
+                    on_chunk=pipeline.poll if pipeline is not None else None
+                )
                 
                 # Store the response in session state for reference
-                st.session_state.optimization_report = response.content
+                st.session_state.optimization_report = report.text
+                st.session_state.optimization_timing = report.timings()
+                st.session_state.pipeline_timing = None
+                if pipeline is not None:
+                    pipeline.timings["optimization"] = report.timings()["total_s"]
+                    st.session_state.pipeline_timing = pipeline.wait()
                 
-                # Extract the optimized JSON payload from the response
-                optimized_payload = extract_json_payload(response.content)
+                # The optimized JSON payload parsed while streaming
+                optimized_payload = report.payload
                 
                 # Extract the scores
-                original_score, enhanced_score = extract_overall_score(response.content)
+                original_score, enhanced_score = extract_overall_score(report.text)
                 
                 if optimized_payload:
                     st.session_state.optimized_payload = optimized_payload
@@ -754,6 +1592,13 @@ def main():
                     st.session_state.show_optimization_tabs = True
                     st.rerun()  # Rerun to show the tabs
         
+        st.checkbox(
+            "Also score my current resume and generate and score the optimized PDF",
+            value=True,
+            key="auto_generate_pdf",
+            help="These steps run in parallel with the optimization instead of one click at a time"
+        )
+        
         # Generate payload for optimization button
         if st.button("Optimize Resume for Job", type="primary"):
             optimize_resume()
@@ -770,9 +1615,34 @@ def main():
             report_tab, generate_tab = st.tabs(["Optimization Report", "Generate PDF"])
             
             with report_tab:
+                timing = st.session_state.get("optimization_timing")
+                if timing:
+                    st.caption(
+                        f"First token after {timing['first_token_s']}s · "
+                        f"resume data after {timing['payload_s']}s · "
+                        f"full report after {timing['total_s']}s"
+                    )
+                pipeline_timing = st.session_state.get("pipeline_timing")
+                if pipeline_timing:
+                    st.caption("Finished after (s): " + ", ".join(
+                        f"{step.replace('_', ' ')} {seconds}" for step, seconds in pipeline_timing.items()
+                    ))
+                if st.session_state.get("original_ats_report"):
+                    with st.expander(f"Current Resume ATS Score: {format_score(st.session_state.original_ats_score)}"):
+                        st.markdown(st.session_state.original_ats_report)
                 st.markdown(st.session_state.optimization_report)
             
             with generate_tab:
+                # A PDF already generated by the optimization pipeline
+                if st.session_state.get("generated_pdf_content"):
+                    st.download_button(
+                        label="Download Optimized Resume",
+                        data=st.session_state.generated_pdf_content,
+                        file_name=f"{st.session_state.full_name.replace(' ', '_')}_resume.pdf",
+                        mime="application/pdf",
+                        key="download_generated_pdf"
+                    )
+                
                 # Display the optimized payload for debugging
                 if st.checkbox("Show JSON Payload (Debug)"):
                     st.json(st.session_state.optimized_payload)
@@ -824,11 +1694,10 @@ def main():
                             try:
                                 st.info(f"Connecting to API at: {api_url}")
                                 
-                                api_response = requests.post(
-                                    api_url, 
-                                    json=st.session_state.optimized_payload, 
-                                    timeout=30,  # Allow up to 30 seconds for PDF generation
-                                    headers={"Content-Type": "application/json"}
+                                # Submit an async job and poll, so long compiles don't hit a request timeout
+                                api_response = generate_pdf_via_job(
+                                    st.session_state.optimized_payload,
+                                    st.empty()
                                 )
                                 
                                 # Check if the request was successful
@@ -850,10 +1719,20 @@ def main():
                                         mime="application/pdf"
                                     )
                                     
+                                    # Show where the server spent its time
+                                    server_timing = parse_server_timing(api_response.headers.get("Server-Timing", ""))
+                                    if server_timing:
+                                        with st.expander("Server timing breakdown"):
+                                            st.table(server_timing)
+                                    
                                     # Add button for checking ATS score (outside the generate PDF button scope)
                                     st.session_state.show_ats_score_button = True
+                                elif api_response.status_code == 429:
+                                    st.warning(pdf_error_message(api_response))
+                                elif pdf_field_errors(api_response):
+                                    st.error(pdf_error_message(api_response))
                                 else:
-                                    st.error(f"Error generating PDF: Status code {api_response.status_code}")
+                                    st.error(pdf_error_message(api_response))
                                     st.write("Response from server:")
                                     st.code(api_response.text[:500], language="text")
                                     
@@ -890,29 +1769,26 @@ def main():
                                 # Store in session state to show we're checking ATS score
                                 st.session_state.checking_ats_score = True
                                 
-                                # Run the ATS scoring agent with the extracted text
-                                ats_agent = get_ats_agent()
+                                # Score the extracted text (locally, or with the ATS agent in deep mode)
                                 job_description = st.session_state.get('job_description', '')
                                 
                                 if not job_description:
                                     st.error("Please provide a job description to check ATS score.")
                                 else:
-                                    prompt = f"""
-                                    Job Description: {job_description}
-
-                                    Resume Text: {pdf_text}
-
-                                    Please score this resume against the job description.
-                                    """
-                                    
-                                    response = ats_agent.run(prompt)
+                                    report_text = run_ats_check(
+                                        job_description,
+                                        "Resume Text",
+                                        pdf_text,
+                                        deep=st.session_state.get("ats_mode") == ATS_MODES[1],
+                                        placeholder=st.empty(),
+                                        use_cache=st.session_state.get("use_llm_cache", True)
+                                    )
                                     
                                     # Store response in session state
-                                    st.session_state.pdf_ats_score_response = response.content
+                                    st.session_state.pdf_ats_score_response = report_text
                                     
                                     # Extract overall score using regex
-                                    import re
-                                    match = re.search(r"Overall Match Percentage: (\d+)%", response.content)
+                                    match = re.search(r"Overall Match Percentage: (\d+)%", report_text)
                                     if match:
                                         score = int(match.group(1))
                                         expected_score = st.session_state.get('expected_score', 85)
@@ -996,22 +1872,24 @@ def add_ats_scoring_tab():
                             "achievements": st.session_state.achievements
                         }
                         
-                        # Run the ATS scoring agent
-                        ats_agent = get_ats_agent()
-                        prompt = f"""
-                        Job Description: {job_description}
-
-                        Resume Payload: {json.dumps(current_payload)}
-
-                        Please score this resume against the job description.
-                        """
-                        
-                        response = ats_agent.run(prompt)
-                        st.session_state.ats_score = response.content
+                        # Score locally, or with the ATS agent in deep mode; an AI report is shown
+                        # as it streams in and moves into the expander below once done
+                        stream_placeholder = st.empty()
+                        streamed = []
+                        report_text = run_ats_check(
+                            job_description,
+                            "Resume Payload",
+                            current_payload,
+                            deep=st.session_state.get("ats_mode") == ATS_MODES[1],
+                            placeholder=stream_placeholder,
+                            use_cache=st.session_state.get("use_llm_cache", True),
+                            on_report=streamed.append
+                        )
+                        stream_placeholder.empty()
+                        st.session_state.ats_score = report_text
                         
                         # Extract overall score using regex
-                        import re
-                        match = re.search(r"Overall Match Percentage: (\d+)%", response.content)
+                        match = re.search(r"Overall Match Percentage: (\d+)%", report_text)
                         if match:
                             score = int(match.group(1))
                             
@@ -1035,7 +1913,9 @@ def add_ats_scoring_tab():
                         
                         # Display the full scoring report
                         with st.expander("View Full ATS Scoring Report", expanded=True):
-                            st.markdown(response.content)
+                            if streamed:
+                                st.caption(f"First token after {streamed[0].timings()['first_token_s']}s")
+                            st.markdown(report_text)
                     
                     except Exception as e:
                         st.error(f"Error calculating ATS score: {str(e)}")
@@ -1,4 +1,4 @@
-from flask import Flask, request, jsonify, send_file
+from flask import Flask, request, jsonify
 from flask_cors import CORS
 import jinja2
 import subprocess
@@ -7,6 +7,33 @@ import json
 import tempfile
 import shutil
 import re
+import hashlib
+import threading
+import time
+import io
+import math
+import uuid
+import hmac
+import functools
+from collections import OrderedDict
+import zipfile
+import queue
+import atexit
+import signal
+from contextlib import contextmanager
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed, TimeoutError as FutureTimeout
+from typing import Annotated, Dict, List
+from pydantic import BaseModel, BeforeValidator, ConfigDict, StringConstraints, ValidationError, field_validator
+
+try:
+    import resource
+except ImportError:  # not available on Windows
+    resource = None
+
+try:
+    import fitz  # PyMuPDF, used by the native renderer
+except ImportError:
+    fitz = None
 
 app = Flask(__name__)
 CORS(app)  # Enable CORS for all routes
@@ -23,12 +50,117 @@ latex_jinja_env = jinja2.Environment(
     line_comment_prefix=r'%#',
     trim_blocks=True,
     autoescape=False,
-    loader=jinja2.FileSystemLoader(os.path.abspath('.'))
 )
 
-# Function to write template to file
-def write_latex_template():
-    latex_template = r"""
+# Jinja2 environment for the HTML layout drawn by the native (PyMuPDF) renderer
+html_jinja_env = jinja2.Environment(autoescape=True, trim_blocks=True, lstrip_blocks=True)
+
+# In-process metrics, exposed on /metrics in the Prometheus text format
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+# Emit a Server-Timing header with the per-stage breakdown on PDF responses
+SERVER_TIMING = os.environ.get('SERVER_TIMING', '1') == '1'
+
+class Metrics:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._meta = {}    # name -> (type, help)
+        self._values = {}  # name -> {labels: value, or [bucket counts, sum, count] for histograms}
+    
+    def define(self, name, kind, help_text):
+        self._meta[name] = (kind, help_text)
+        self._values[name] = {}
+    
+    def inc(self, name, amount=1, **labels):
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            series = self._values[name]
+            series[key] = series.get(key, 0) + amount
+    
+    def set(self, name, value, **labels):
+        with self._lock:
+            self._values[name][tuple(sorted(labels.items()))] = value
+    
+    def observe(self, name, value, **labels):
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            series = self._values[name]
+            histogram = series.get(key)
+            if histogram is None:
+                histogram = series[key] = [[0] * len(LATENCY_BUCKETS), 0.0, 0]
+            for index, bound in enumerate(LATENCY_BUCKETS):
+                if value <= bound:
+                    histogram[0][index] += 1
+            histogram[1] += value
+            histogram[2] += 1
+    
+    @staticmethod
+    def _labels(pairs):
+        if not pairs:
+            return ''
+        escaped = []
+        for key, value in pairs:
+            value = str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+            escaped.append(f'{key}="{value}"')
+        return '{' + ','.join(escaped) + '}'
+    
+    def render(self):
+        lines = []
+        with self._lock:
+            for name, (kind, help_text) in self._meta.items():
+                lines.append(f'# HELP {name} {help_text}')
+                lines.append(f'# TYPE {name} {kind}')
+                for key, value in sorted(self._values[name].items()):
+                    if kind != 'histogram':
+                        lines.append(f'{name}{self._labels(key)} {value}')
+                        continue
+                    buckets, total, count = value
+                    for bound, bucket_count in zip(LATENCY_BUCKETS, buckets):
+                        lines.append(f'{name}_bucket{self._labels(key + (("le", bound),))} {bucket_count}')
+                    lines.append(f'{name}_bucket{self._labels(key + (("le", "+Inf"),))} {count}')
+                    lines.append(f'{name}_sum{self._labels(key)} {total}')
+                    lines.append(f'{name}_count{self._labels(key)} {count}')
+        return '\n'.join(lines) + '\n'
+
+metrics = Metrics()
+metrics.define('resume_stage_seconds', 'histogram', 'Time spent in each stage of PDF generation.')
+metrics.define('resume_request_seconds', 'histogram', 'End-to-end handler latency per endpoint.')
+metrics.define('resume_requests_total', 'counter', 'Requests per endpoint and outcome.')
+metrics.define('resume_compiles_in_flight', 'gauge', 'pdflatex compiles currently running.')
+metrics.set('resume_compiles_in_flight', 0)
+metrics.define('resume_pdf_cache_lookups_total', 'counter', 'PDF cache lookups by result.')
+metrics.define('resume_latex_passes_total', 'counter', 'Compiles by number of pdflatex passes.')
+metrics.define('resume_jobs', 'gauge', 'Async jobs by state.')
+metrics.define('resume_compiles_killed_total', 'counter', 'pdflatex compiles killed, by reason.')
+metrics.define('resume_sandbox_overflows_total', 'counter', 'Compiles that found the sandbox pool empty.')
+metrics.define('resume_rejected_requests_total', 'counter', 'Requests turned away with 429, by reason.')
+metrics.define('resume_coalesced_requests_total', 'counter', 'Requests that waited for an identical in-flight build.')
+metrics.define('resume_template_requests_total', 'counter', 'LaTeX requests per template, by cache/compile result.')
+metrics.define('resume_template_build_seconds', 'histogram', 'Render plus compile time per template.')
+metrics.define('resume_template_warmup_seconds', 'gauge', 'Duration of the last warm-up of each template.')
+
+# Times the stages of one request; each stage also feeds resume_stage_seconds
+class StageTimer:
+    def __init__(self):
+        self.stages = []
+    
+    @contextmanager
+    def stage(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - start)
+    
+    def record(self, name, seconds):
+        self.stages.append((name, seconds))
+        metrics.observe('resume_stage_seconds', seconds, stage=name)
+    
+    # Server-Timing header value, e.g. "sanitize;dur=0.41, render;dur=1.20, pass1;dur=812.03"
+    def server_timing(self):
+        return ', '.join(f'{name};dur={seconds * 1000:.2f}' for name, seconds in self.stages)
+
+# LaTeX source of the resume template
+LATEX_TEMPLATE = r"""
 \documentclass[11pt,letterpaper]{article}
 
 % Essential packages
@@ -58,8 +190,7 @@ def write_latex_template():
     colorlinks=true,
     linkcolor=primary,
     urlcolor=secondary,
-    pdftitle={Software Engineer Resume},
-    pdfauthor={\VAR{Full_Name}}
+    pdftitle={Software Engineer Resume}
 }
 
 % Set page style
@@ -107,6 +238,9 @@ def write_latex_template():
 
 \begin{document}
 
+% Payload-dependent PDF metadata lives here so the preamble stays static
+\hypersetup{pdfauthor={\VAR{Full_Name}}}
+
 % Header section
 \begin{minipage}[t]{0.6\textwidth}
     \headerName{\VAR{Full_Name}}\\[4pt]
@@ -163,11 +297,13 @@ def write_latex_template():
 %%for job in experience
 \jobTitle{\VAR{job.title}}{\VAR{job.duration}}
 \companyInfo{\VAR{job.company}}{\VAR{job.location}}
+%%if job.responsibilities
 \customBullets{
   %%for point in job.responsibilities
   \bulletItem{\VAR{point}}
   %%endfor
 }
+%%endif
 
 \vspace{8pt}
 %%endfor
@@ -178,11 +314,13 @@ def write_latex_template():
 %%for project in projects
 \jobTitle{\VAR{project.title}}{\VAR{project.duration}}
 \companyInfo{\VAR{project.link}}{\VAR{project.type}}
+%%if project.details
 \customBullets{
   %%for point in project.details
   \bulletItem{\VAR{point}}
   %%endfor
 }
+%%endif
 \vspace{8pt}
 %%endfor
 
@@ -192,31 +330,39 @@ def write_latex_template():
 %%for degree in education
 \jobTitle{\VAR{degree.title}}{\VAR{degree.duration}}
 \companyInfo{\VAR{degree.university}}{\VAR{degree.gpa}}
+%%if degree.details
 \customBullets{
   %%for point in degree.details
   \bulletItem{\VAR{point}}
   %%endfor
 }
+%%endif
 \vspace{4pt}
 %%endfor
 
 % Certifications section
+%%if certifications or achievements
 \section{CERTIFICATIONS \& ACHIEVEMENTS}
 \begin{multicols}{2}
+%%if certifications
 \customBullets{
   %%for cert in certifications
   \bulletItem{\VAR{cert}}
   %%endfor
 }
+%%endif
 
 \columnbreak
 
+%%if achievements
 \customBullets{
   %%for achievement in achievements
   \bulletItem{\VAR{achievement}}
   %%endfor
 }
+%%endif
 \end{multicols}
+%%endif
 
 
 \vspace{-0.3cm}
@@ -226,145 +372,1912 @@ def write_latex_template():
 
 \end{document}
 """
-    with open('resume_template.tex', 'w') as f:
-        f.write(latex_template)
+
+# Optional override: load the template source from a file instead of LATEX_TEMPLATE
+LATEX_TEMPLATE_PATH = os.environ.get('LATEX_TEMPLATE_PATH')
+
+# Preamble format files (.fmt) are built here, one per template version
+LATEX_FORMAT_DIR = os.environ.get(
+    'LATEX_FORMAT_DIR', os.path.join(tempfile.gettempdir(), 'resume_latex_formats')
+)
+PRECOMPILE_PREAMBLE = os.environ.get('LATEX_PRECOMPILE_PREAMBLE', '1') != '0'
+
+DOCUMENT_BEGIN = r'\begin{document}'
+
+# Split a LaTeX source into (preamble, body) at \begin{document}
+def split_latex_preamble(source):
+    index = source.find(DOCUMENT_BEGIN)
+    if index == -1:
+        return None, source
+    return source[:index], source[index:]
+
+# pdflatex environment that also searches a template's asset directory
+def latex_env(asset_dir=None, **extra):
+    env = dict(os.environ, **extra)
+    if asset_dir:
+        # The trailing separator keeps the default search path after the assets
+        env['TEXINPUTS'] = asset_dir + os.pathsep + os.environ.get('TEXINPUTS', '')
+    return env
+
+# Dump the static preamble into a custom pdflatex format; returns its name or None
+def build_latex_format(preamble, name, asset_dir=None):
+    # Only a preamble that does not depend on the payload can be precompiled
+    if preamble is None or latex_jinja_env.from_string(preamble).render().rstrip('\n') != preamble.rstrip('\n'):
+        return None
+    fmt_path = os.path.join(LATEX_FORMAT_DIR, name + '.fmt')
+    if os.path.exists(fmt_path):
+        return name
+    
+    try:
+        os.makedirs(LATEX_FORMAT_DIR, exist_ok=True)
+        # Build under a private job name so concurrent workers don't clobber each other
+        job_name = f'{name}-{os.getpid()}'
+        with open(os.path.join(LATEX_FORMAT_DIR, job_name + '.tex'), 'w') as f:
+            f.write(preamble)
+            f.write('\n\\dump\n')
+        process = subprocess.run(
+            ['pdflatex', '-ini', '-interaction=nonstopmode', f'-jobname={job_name}',
+             '&pdflatex', job_name + '.tex'],
+            cwd=LATEX_FORMAT_DIR,
+            env=latex_env(asset_dir),
+            capture_output=True,
+            text=True,
+            check=False
+        )
+        built_path = os.path.join(LATEX_FORMAT_DIR, job_name + '.fmt')
+        if process.returncode != 0 or not os.path.exists(built_path):
+            return None
+        os.replace(built_path, fmt_path)
+        return name
+    except OSError:
+        return None
+
+# pdflatex keeps running until the output converges, up to this many passes
+MAX_LATEX_PASSES = max(1, int(os.environ.get('LATEX_MAX_PASSES', 3)))
+
+# Log messages LaTeX and common packages emit when another pass is needed
+RERUN_PATTERN = re.compile(r'Rerun to get|[Rr]erun LaTeX|Label\(s\) may have changed')
+# Aux entries whose values are read back by the next pass
+AUX_REFERENCE_PATTERN = re.compile(r'\\(?:newlabel|bibcite)')
+# Lines for auxiliary lists (toc, lof, ...); \section alone writes these, so they only
+# matter when the document actually reads the list (e.g. \tableofcontents)
+AUX_WRITEFILE_PATTERN = re.compile(r'\\@writefile\{(\w+)\}')
+
+# Per-compile limits: wall clock across all passes, and per-process CPU, memory and file size
+LATEX_TIMEOUT_SECONDS = float(os.environ.get('LATEX_TIMEOUT_SECONDS', 30))
+LATEX_CPU_SECONDS = int(os.environ.get('LATEX_CPU_SECONDS', 20))
+LATEX_MEMORY_BYTES = int(os.environ.get('LATEX_MEMORY_MB', 1024)) * 1024 * 1024
+LATEX_MAX_FILE_BYTES = int(os.environ.get('LATEX_MAX_FILE_MB', 64)) * 1024 * 1024
+
+# Raised when a compile is killed for running too long or because it was cancelled
+class CompileKilled(Exception):
+    def __init__(self, reason):
+        super().__init__(f'pdflatex was killed ({reason})')
+        self.reason = reason
+
+# The rlimits are applied by exec'ing pdflatex through prlimit(1): preexec_fn is not
+# safe in this multithreaded server. Without prlimit they are set on the child right
+# after it starts instead (Linux only).
+PRLIMIT = shutil.which('prlimit') if resource else None
+
+# argv that runs a pdflatex command under the CPU time, address space and file size limits
+def limited_latex_command(args):
+    if not PRLIMIT:
+        return list(args)
+    return [
+        PRLIMIT,
+        f'--cpu={LATEX_CPU_SECONDS}:{LATEX_CPU_SECONDS + 1}',
+        f'--as={LATEX_MEMORY_BYTES}',
+        f'--fsize={LATEX_MAX_FILE_BYTES}',
+        '--',
+        *args,
+    ]
+
+# Fallback for hosts without prlimit(1): limit an already running child
+def limit_latex_resources(pid):
+    if PRLIMIT or not resource or not hasattr(resource, 'prlimit'):
+        return
+    try:
+        resource.prlimit(pid, resource.RLIMIT_CPU, (LATEX_CPU_SECONDS, LATEX_CPU_SECONDS + 1))
+        resource.prlimit(pid, resource.RLIMIT_AS, (LATEX_MEMORY_BYTES, LATEX_MEMORY_BYTES))
+        resource.prlimit(pid, resource.RLIMIT_FSIZE, (LATEX_MAX_FILE_BYTES, LATEX_MAX_FILE_BYTES))
+    except (OSError, ValueError):
+        pass  # the child already exited
+
+# Run one pdflatex pass in its own process group. The whole group is killed when the
+# deadline passes or cancel_event is set, so no stray children outlive the request.
+def run_pdflatex(args, work_dir, env, deadline, cancel_event=None):
+    process = subprocess.Popen(
+        limited_latex_command(args),
+        cwd=work_dir,
+        env=env,
+        stdin=subprocess.DEVNULL,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        text=True,
+        start_new_session=True
+    )
+    limit_latex_resources(process.pid)
+    while True:
+        try:
+            stdout, stderr = process.communicate(timeout=0.1)
+            break
+        except subprocess.TimeoutExpired:
+            if cancel_event is not None and cancel_event.is_set():
+                reason = 'cancelled'
+            elif time.monotonic() >= deadline:
+                reason = 'timeout'
+            else:
+                continue
+            try:
+                os.killpg(process.pid, signal.SIGKILL)
+            except ProcessLookupError:
+                pass
+            process.communicate()
+            metrics.inc('resume_compiles_killed_total', reason=reason)
+            raise CompileKilled(reason)
+    
+    # The kernel enforces the rlimits; count those kills as well
+    if resource and process.returncode in (-signal.SIGXCPU, -signal.SIGKILL, -signal.SIGXFSZ):
+        metrics.inc('resume_compiles_killed_total', reason='resource_limit')
+    return subprocess.CompletedProcess(args, process.returncode, stdout, stderr)
+
+# Histogram of pdflatex passes per compile, reported in /health
+_compile_stats_lock = threading.Lock()
+compile_pass_counts = {}
+
+# Read a pdflatex output file, treating a missing file as empty
+def read_latex_output(path):
+    try:
+        with open(path, 'r', encoding='utf-8', errors='replace') as f:
+            return f.read()
+    except OSError:
+        return ''
+
+# Latexmk-style check: would another pass change the output?
+def latex_needs_rerun(log_text, aux_text, previous_aux_hash, aux_hash, jobname='resume'):
+    # The log is hard-wrapped at 79 columns, so join lines before matching
+    log_text = log_text.replace('\n', '')
+    if RERUN_PATTERN.search(log_text):
+        return True
+    if aux_hash == previous_aux_hash:
+        return False
+    if AUX_REFERENCE_PATTERN.search(aux_text):
+        return True
+    # A list file is read back only if the pass opened it ("(./resume.toc" or "No file resume.toc")
+    return any(f'{jobname}.{ext}' in log_text for ext in set(AUX_WRITEFILE_PATTERN.findall(aux_text)))
+
+# Compile rendered LaTeX to resume.pdf in work_dir, against the preamble format if given.
+# asset_dir is the template's directory of .sty/.cls/image files, if it has one.
+# Returns the last pdflatex process and the number of passes that ran.
+def compile_latex(rendered_tex, work_dir, fmt_name=None, timer=None, cancel_event=None, deadline=None,
+                  asset_dir=None):
+    deadline = deadline or time.monotonic() + LATEX_TIMEOUT_SECONDS
+    args, env, fmt_name = prepare_latex_compile(rendered_tex, work_dir, fmt_name, asset_dir)
+    
+    passes = 0
+    previous_aux_hash = None  # the first pass reads no aux file
+    while True:
+        # Compile the LaTeX file to PDF using pdflatex with nonstopmode
+        start = time.perf_counter()
+        process = run_pdflatex(args, work_dir, env, deadline, cancel_event)
+        passes += 1
+        if timer:
+            timer.record(f'pass{passes}', time.perf_counter() - start)
+        if process.returncode != 0 or passes >= MAX_LATEX_PASSES:
+            break
+        
+        # Only run again when the aux/log say the output would change
+        rerun, previous_aux_hash = latex_pass_needs_rerun(work_dir, previous_aux_hash)
+        if not rerun:
+            break
+    
+    # Fall back to the plain path if the format could not be used
+    if format_compile_failed(work_dir, fmt_name):
+        return compile_latex(rendered_tex, work_dir, timer=timer, cancel_event=cancel_event, deadline=deadline,
+                             asset_dir=asset_dir)
+    
+    record_compile_passes(passes)
+    return process, passes
+
+# Write resume.tex into work_dir and work out the pdflatex invocation. The format is
+# used when it exists (only the body is then typeset); returns (args, env, fmt_name)
+# with fmt_name None when compiling the full document.
+def prepare_latex_compile(rendered_tex, work_dir, fmt_name=None, asset_dir=None):
+    args = ['pdflatex', '-interaction=nonstopmode']
+    env = latex_env(asset_dir) if asset_dir else None
+    tex = rendered_tex
+    if fmt_name and os.path.exists(os.path.join(LATEX_FORMAT_DIR, fmt_name + '.fmt')):
+        # The format already holds the preamble, so only the body is typeset
+        _, tex = split_latex_preamble(rendered_tex)
+        args.append(f'-fmt={fmt_name}')
+        env = latex_env(asset_dir, TEXFORMATS=LATEX_FORMAT_DIR + os.pathsep)
+    else:
+        fmt_name = None
+    
+    with open(os.path.join(work_dir, 'resume.tex'), 'w') as f:
+        f.write(tex)
+    return args + ['resume.tex'], env, fmt_name
+
+# After a clean pass: would another one change the output? Returns (rerun, aux_hash)
+def latex_pass_needs_rerun(work_dir, previous_aux_hash):
+    aux_text = read_latex_output(os.path.join(work_dir, 'resume.aux'))
+    aux_hash = hashlib.sha256(aux_text.encode('utf-8')).hexdigest()
+    log_text = read_latex_output(os.path.join(work_dir, 'resume.log'))
+    return latex_needs_rerun(log_text, aux_text, previous_aux_hash, aux_hash), aux_hash
+
+# True when a compile against a format produced no PDF; clears its aux file so the
+# caller can retry without the format
+def format_compile_failed(work_dir, fmt_name):
+    if not fmt_name or os.path.exists(os.path.join(work_dir, 'resume.pdf')):
+        return False
+    if os.path.exists(os.path.join(work_dir, 'resume.aux')):
+        os.remove(os.path.join(work_dir, 'resume.aux'))
+    return True
+
+def record_compile_passes(passes):
+    with _compile_stats_lock:
+        compile_pass_counts[passes] = compile_pass_counts.get(passes, 0) + 1
+
+# Template registry: templates are compiled once and rendered from memory.
+# Besides the built-in LATEX_TEMPLATE ('resume'), every LATEX_TEMPLATES_DIR/<name>/
+# holding a template.tex is a template; other files in that directory (.sty, .cls,
+# images) are its assets and are visible to pdflatex through TEXINPUTS.
+LATEX_TEMPLATES_DIR = os.environ.get(
+    'LATEX_TEMPLATES_DIR', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'latex_templates')
+)
+DEFAULT_TEMPLATE = 'resume'
+TEMPLATE_SOURCE_NAME = 'template.tex'
+TEMPLATE_NAME_PATTERN = re.compile(r'[A-Za-z0-9][A-Za-z0-9_-]*')
+# How each template is warmed before it serves requests: 'compile' (sample render
+# plus a full compile), 'render' (sample render only) or 'off'
+TEMPLATE_WARMUP = os.environ.get('TEMPLATE_WARMUP', 'compile')
+
+# Sample payload for warm-up renders; exercises every section of a template
+TEMPLATE_WARMUP_PAYLOAD = {
+    'Full_Name': 'Warm Up', 'Designation': 'Engineer', 'Email': 'warm@example.com',
+    'Mobile': '+1 555 0100', 'Location': 'Remote', 'Linkedin_url': 'linkedin.com/in/warmup',
+    'github_url': 'github.com/warmup', 'summary': 'Sample summary with 100% of the special characters: & # _ $.',
+    'skills_data': {'Languages': ['Python', 'C#'], 'Tools': ['Git']},
+    'experience': [{'title': 'Engineer', 'company': 'R&D Co', 'location': 'Remote',
+                    'duration': '2020 - Present', 'responsibilities': ['Built things']}],
+    'projects': [{'title': 'Project', 'link': 'github.com/warmup/project', 'type': 'Open Source',
+                  'duration': '2023', 'details': ['Did things']}],
+    'education': [{'title': 'B.Sc.', 'university': 'University', 'gpa': '4.0',
+                   'duration': '2016 - 2020', 'details': ['Studied']}],
+    'certifications': ['Certified'],
+    'achievements': ['Achieved'],
+}
+
+_template_lock = threading.Lock()
+# Serializes reloads; requests never take this lock
+_template_reload_lock = threading.Lock()
+_template_registry = {}
+
+# Every available template as {name: asset directory}; the built-in one has no directory
+def discover_latex_templates():
+    templates = {DEFAULT_TEMPLATE: None}
+    try:
+        names = sorted(os.listdir(LATEX_TEMPLATES_DIR))
+    except OSError:
+        return templates
+    for name in names:
+        template_dir = os.path.join(LATEX_TEMPLATES_DIR, name)
+        if TEMPLATE_NAME_PATTERN.fullmatch(name) and os.path.isfile(os.path.join(template_dir, TEMPLATE_SOURCE_NAME)):
+            templates[name] = template_dir
+    return templates
+
+# Read the template source (built-in, override file, or the template's directory)
+def read_latex_template_source(template_dir=None):
+    path = os.path.join(template_dir, TEMPLATE_SOURCE_NAME) if template_dir else LATEX_TEMPLATE_PATH
+    if path:
+        with open(path, 'r', encoding='utf-8') as f:
+            return f.read()
+    return LATEX_TEMPLATE
+
+# Version of a template: its source plus every asset file, so editing a .sty
+# also yields a new format file and new cache keys
+def latex_template_version(source, template_dir=None):
+    digest = hashlib.sha256(source.encode('utf-8'))
+    if template_dir:
+        for root, dirs, files in os.walk(template_dir):
+            dirs.sort()
+            for file_name in sorted(files):
+                path = os.path.join(root, file_name)
+                digest.update(os.path.relpath(path, template_dir).encode('utf-8'))
+                with open(path, 'rb') as f:
+                    digest.update(f.read())
+    return digest.hexdigest()[:16]
+
+# Prime a freshly compiled template with a sample render (and compile), so its
+# first real request does no one-time work. A template whose Jinja fails on the
+# sample is rejected; a failed compile is only logged.
+def warm_latex_template(entry):
+    if TEMPLATE_WARMUP == 'off':
+        return
+    started_at = time.perf_counter()
+    processed_data = process_data(validate_payload(TEMPLATE_WARMUP_PAYLOAD))
+    entry['template'].render(**processed_data)
+    if TEMPLATE_WARMUP == 'compile':
+        try:
+            if build_resume_pdf(processed_data, entry)['pdf'] is None:
+                app.logger.warning('Warm-up compile of template %s produced no PDF', entry['name'])
+        except Exception as e:
+            app.logger.warning('Warm-up compile of template %s failed: %s', entry['name'], e)
+    entry['warmup_seconds'] = time.perf_counter() - started_at
+    metrics.set('resume_template_warmup_seconds', entry['warmup_seconds'], template=entry['name'])
+
+# Compile and warm a template, then register it under the given name. The new
+# entry replaces the old one in a single swap; requests already holding the old
+# entry finish with it (its format file stays on disk under its own version).
+def load_latex_template(name=DEFAULT_TEMPLATE, template_dir=None):
+    source = read_latex_template_source(template_dir)
+    version = latex_template_version(source, template_dir)
+    preamble, _ = split_latex_preamble(source)
+    entry = {
+        'name': name,
+        'template': latex_jinja_env.from_string(source),
+        'source': source,
+        'version': version,
+        'assets': template_dir,
+        'format': build_latex_format(preamble, f'{name}_{version}', template_dir) if PRECOMPILE_PREAMBLE else None,
+        'loaded_at': time.time(),
+        'warmup_seconds': None,
+    }
+    warm_latex_template(entry)
+    with _template_lock:
+        _template_registry[name] = entry
+    return entry
+
+# Return the compiled template entry, compiling it on first use
+def get_latex_template(name=DEFAULT_TEMPLATE):
+    entry = _template_registry.get(name)
+    if entry is None:
+        templates = discover_latex_templates()
+        if name not in templates:
+            raise KeyError(f"Unknown template '{name}'")
+        entry = load_latex_template(name, templates[name])
+    return entry
+
+# (Re)discover and recompile every template; templates whose directory is gone are
+# dropped, and one that fails to compile keeps serving its previous version
+def reload_latex_templates():
+    with _template_reload_lock:
+        templates = discover_latex_templates()
+        errors = {}
+        for name, template_dir in templates.items():
+            try:
+                load_latex_template(name, template_dir)
+            except Exception as e:
+                app.logger.error('Could not load template %s: %s', name, e)
+                errors[name] = str(e)
+        with _template_lock:
+            for name in [name for name in _template_registry if name not in templates]:
+                del _template_registry[name]
+            versions = {name: entry['version'] for name, entry in _template_registry.items()}
+    return versions, errors
+
+# Schema of the payload the resume template consumes. Validation runs before
+# any rendering so a malformed request costs microseconds, not a compile.
+# Numbers are accepted where text is expected (e.g. a GPA of 3.9), unknown
+# fields are dropped, and blank entries left by the Streamlit dynamic lists
+# ('' bullets, empty jobs, empty skill categories) are removed. A null optional
+# field (as the LLM emits for a missing link or section) counts as empty.
+def drop_blank_strings(items):
+    if items is None:
+        return []
+    if isinstance(items, list):
+        return [item for item in items if not (item is None or isinstance(item, str) and not item.strip())]
+    return items
+
+def null_as(empty):
+    return BeforeValidator(lambda value: empty() if value is None else value)
+
+Text = Annotated[str, null_as(str)]
+TextList = Annotated[List[str], BeforeValidator(drop_blank_strings)]
+
+class PayloadModel(BaseModel):
+    model_config = ConfigDict(extra='ignore', coerce_numbers_to_str=True)
+
+class ResumeEntry(PayloadModel):
+    title: Text = ''
+    duration: Text = ''
+    
+    # True when every field is empty, i.e. an untouched form row
+    def is_blank(self):
+        return not any(self.__dict__.values())
+
+class ExperienceEntry(ResumeEntry):
+    company: Text = ''
+    location: Text = ''
+    responsibilities: TextList = []
+
+class ProjectEntry(ResumeEntry):
+    link: Text = ''
+    type: Text = ''
+    details: TextList = []
+
+class EducationEntry(ResumeEntry):
+    university: Text = ''
+    gpa: Text = ''
+    details: TextList = []
+
+class ResumePayload(PayloadModel):
+    Full_Name: Annotated[str, StringConstraints(strip_whitespace=True, min_length=1)]
+    Designation: Text = ''
+    Email: Text = ''
+    Mobile: Text = ''
+    Location: Text = ''
+    Linkedin_url: Text = ''
+    github_url: Text = ''
+    summary: Text = ''
+    skills_data: Annotated[Dict[str, TextList], null_as(dict)] = {}
+    experience: Annotated[List[ExperienceEntry], null_as(list)]
+    projects: Annotated[List[ProjectEntry], null_as(list)] = []
+    education: Annotated[List[EducationEntry], null_as(list)] = []
+    certifications: TextList = []
+    achievements: TextList = []
+    # Registry name of the LaTeX layout to render with
+    template: str = DEFAULT_TEMPLATE
+    
+    @field_validator('template')
+    @classmethod
+    def known_template(cls, name):
+        if _template_registry and name not in _template_registry:
+            raise ValueError(f"unknown template, expected one of: {', '.join(sorted(_template_registry))}")
+        return name
+    
+    @field_validator('skills_data')
+    @classmethod
+    def drop_empty_categories(cls, skills_data):
+        return {category: skills for category, skills in skills_data.items() if category.strip() and skills}
+    
+    @field_validator('experience', 'projects', 'education')
+    @classmethod
+    def drop_blank_entries(cls, entries):
+        return [entry for entry in entries if not entry.is_blank()]
+
+# Raised for a payload that does not match ResumePayload; errors holds one
+# {'field', 'message', 'type'} dict per problem, e.g. field 'experience.0.title'
+class InvalidPayload(ValueError):
+    def __init__(self, errors):
+        self.errors = errors
+        super().__init__('; '.join(f"{error['field']}: {error['message']}" for error in errors))
+
+# Validate and normalize a request payload into plain dicts for the renderers
+def validate_payload(data):
+    try:
+        return ResumePayload.model_validate(data).model_dump()
+    except ValidationError as e:
+        raise InvalidPayload([
+            {'field': '.'.join(str(part) for part in error['loc']) or '(payload)',
+             'message': error['msg'], 'type': error['type']}
+            for error in e.errors(include_url=False)
+        ])
+
+# LaTeX escapes for special characters, applied in a single regex pass.
+# The backslash maps to \textbackslash\{\} because the old sequential replace
+# escaped the braces it had just introduced; output stays byte-identical.
+LATEX_ESCAPES = {
+    '\\': '\\textbackslash\\{\\}',
+    '$': '\\$',
+    '%': '\\%',
+    '&': '\\&',
+    '#': '\\#',
+    '_': '\\_',
+    '{': '\\{',
+    '}': '\\}',
+    '~': '\\textasciitilde{}',
+    '^': '\\textasciicircum{}',
+    '<': '\\textless{}',
+    '>': '\\textgreater{}',
+}
+LATEX_SPECIAL_RE = re.compile(r'[\\$%&#_{}~^<>]')
+
+def escape_latex_match(match):
+    return LATEX_ESCAPES[match.group()]
+
+# Collapse every whitespace run to a single space (same as re.sub(r'\s+', ' ', text))
+def collapse_whitespace(text):
+    # str.split() uses the same Unicode whitespace definition as \s but runs in C
+    parts = text.split()
+    if not parts:
+        return ' ' if text else ''
+    collapsed = ' '.join(parts)
+    if text[0].isspace():
+        collapsed = ' ' + collapsed
+    if text[-1].isspace():
+        collapsed += ' '
+    return collapsed
 
 # Function to thoroughly sanitize LaTeX input
 def sanitize_latex(text):
     if not isinstance(text, str):
         return text
     
-    # Replace backslashes first
-    text = text.replace('\\', '\\textbackslash{}')
-    
-    # Replace special LaTeX characters
-    replacements = {
-        '$': '\\$',
-        '%': '\\%',
-        '&': '\\&',
-        '#': '\\#',
-        '_': '\\_',
-        '{': '\\{',
-        '}': '\\}',
-        '~': '\\textasciitilde{}',
-        '^': '\\textasciicircum{}',
-        '<': '\\textless{}',
-        '>': '\\textgreater{}',
-    }
-    
-    for char, replacement in replacements.items():
-        text = text.replace(char, replacement)
-    
-    # Fix common issues with LaTeX
-    # Replace consecutive spaces with a single space
-    text = re.sub(r'\s+', ' ', text)
+    # Escape special LaTeX characters, then collapse consecutive whitespace
+    sanitized = collapse_whitespace(LATEX_SPECIAL_RE.sub(escape_latex_match, text))
     
-    return text
+    # Hand back the original object when nothing changed, so callers can skip copies
+    return text if sanitized == text else sanitized
 
-# Process all data recursively
+# Process all data without recursion. Containers whose contents are unchanged
+# are reused as-is instead of being rebuilt.
 def process_data(obj):
-    if isinstance(obj, dict):
-        return {k: process_data(v) for k, v in obj.items()}
-    elif isinstance(obj, list):
-        return [process_data(item) for item in obj]
-    else:
+    if not isinstance(obj, (dict, list)):
         return sanitize_latex(obj)
-
-@app.route('/generate_resume', methods=['POST'])
-def generate_resume():
-    try:
-        # Get form data from request
-        data = request.json
-        
-        # Create a copy of the data for debugging
-        with open('debug_input.json', 'w') as f:
-            json.dump(data, f, indent=2)
-        
-        # Process and sanitize all data
-        processed_data = process_data(data)
-        
-        # Save the processed data for debugging
-        with open('debug_processed.json', 'w') as f:
-            json.dump(processed_data, f, indent=2)
-        
-        # Create a temporary directory for the resume generation
-        temp_dir = tempfile.mkdtemp()
+    
+    processed = {}  # id(container) -> sanitized container
+    stack = [(obj, False)]
+    while stack:
+        node, children_done = stack.pop()
+        if id(node) in processed:
+            continue
+        values = node.values() if isinstance(node, dict) else node
         
-        # Create the resume template file
-        write_latex_template()
-        shutil.copy('resume_template.tex', os.path.join(temp_dir, 'resume_template.tex'))
+        # First visit: sanitize the child containers before this one
+        if not children_done:
+            stack.append((node, True))
+            stack.extend((value, False) for value in values
+                         if isinstance(value, (dict, list)) and id(value) not in processed)
+            continue
         
-        # Change to the temporary directory
-        original_dir = os.getcwd()
-        os.chdir(temp_dir)
+        new_values = [processed[id(value)] if isinstance(value, (dict, list)) else sanitize_latex(value)
+                      for value in values]
+        if all(new is old for new, old in zip(new_values, values)):
+            processed[id(node)] = node
+        elif isinstance(node, dict):
+            processed[id(node)] = dict(zip(node.keys(), new_values))
+        else:
+            processed[id(node)] = new_values
+    return processed[id(obj)]
+
+# Content-addressed cache of generated PDFs with LRU eviction
+class PDFCache:
+    def __init__(self, max_bytes, disk_dir=None, max_disk_bytes=0):
+        self.max_bytes = max_bytes
+        self.disk_dir = disk_dir
+        self.max_disk_bytes = max_disk_bytes if disk_dir else 0
+        self.hits = 0
+        self.misses = 0
+        self._memory = OrderedDict()
+        self._memory_bytes = 0
+        self._disk = OrderedDict()
+        self._disk_bytes = 0
+        self._lock = threading.Lock()
+        if self.max_disk_bytes:
+            os.makedirs(disk_dir, exist_ok=True)
+            self._load_disk_index()
+
+    # Rebuild the disk LRU order from file modification times
+    def _load_disk_index(self):
+        entries = []
+        for name in os.listdir(self.disk_dir):
+            if name.endswith('.pdf'):
+                stat = os.stat(os.path.join(self.disk_dir, name))
+                entries.append((stat.st_mtime, name[:-4], stat.st_size))
+        for _, key, size in sorted(entries):
+            self._disk[key] = size
+            self._disk_bytes += size
+        self._remove_files(self._evict_disk())
+
+    def _disk_path(self, key):
+        return os.path.join(self.disk_dir, key + '.pdf')
+
+    def _evict_memory(self):
+        while self._memory_bytes > self.max_bytes and self._memory:
+            _, data = self._memory.popitem(last=False)
+            self._memory_bytes -= len(data)
+
+    # Drop disk entries beyond the budget from the index; returns their paths, which
+    # the caller removes with _remove_files() once it has released the lock
+    def _evict_disk(self):
+        evicted = []
+        while self._disk_bytes > self.max_disk_bytes and self._disk:
+            key, size = self._disk.popitem(last=False)
+            self._disk_bytes -= size
+            evicted.append(self._disk_path(key))
+        return evicted
+    
+    def _remove_files(self, paths):
+        for path in paths:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+    def _put_memory(self, key, data):
+        if len(data) > self.max_bytes:
+            return
+        if key in self._memory:
+            self._memory_bytes -= len(self._memory.pop(key))
+        self._memory[key] = data
+        self._memory_bytes += len(data)
+        self._evict_memory()
+
+    def get(self, key):
+        with self._lock:
+            data = self._memory.get(key)
+            if data is not None:
+                self._memory.move_to_end(key)
+                self.hits += 1
+                return data
+            if key not in self._disk:
+                self.misses += 1
+                return None
         
-        # Render the LaTeX template with the provided data
-        template = latex_jinja_env.get_template('resume_template.tex')
-        rendered_tex = template.render(**processed_data)
+        # Read the disk tier without holding the lock, so memory hits never wait on it.
+        # The file may be evicted meanwhile; that is just a miss.
+        path = self._disk_path(key)
+        try:
+            with open(path, 'rb') as f:
+                data = f.read()
+            os.utime(path)
+        except OSError:
+            data = None
+        with self._lock:
+            if data is None:
+                if key in self._disk:
+                    self._disk_bytes -= self._disk.pop(key)
+                self.misses += 1
+                return None
+            if key in self._disk:
+                self._disk.move_to_end(key)
+            self._put_memory(key, data)
+            self.hits += 1
+            return data
+
+    def put(self, key, data):
+        with self._lock:
+            self._put_memory(key, data)
+            if not self.max_disk_bytes or len(data) > self.max_disk_bytes or key in self._disk:
+                return
         
-        # Write the rendered LaTeX to a file
-        with open('resume.tex', 'w') as f:
-            f.write(rendered_tex)
+        # Write to disk without holding the lock, so lookups never wait on the I/O.
+        # A failed write only costs the disk copy; the PDF itself is still served.
+        path = self._disk_path(key)
+        tmp_path = f'{path}.{threading.get_ident()}.tmp'
+        try:
+            with open(tmp_path, 'wb') as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            app.logger.warning('Could not write %s to the PDF disk cache: %s', key, e)
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+            return
+        with self._lock:
+            if key in self._disk:
+                return
+            self._disk[key] = len(data)
+            self._disk_bytes += len(data)
+            evicted = self._evict_disk()
+        self._remove_files(evicted)
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0,
+                'memory_entries': len(self._memory),
+                'memory_bytes': self._memory_bytes,
+                'max_memory_bytes': self.max_bytes,
+                'disk_entries': len(self._disk),
+                'disk_bytes': self._disk_bytes,
+                'max_disk_bytes': self.max_disk_bytes,
+            }
+
+# Cache budgets are configurable through the environment
+pdf_cache = PDFCache(
+    max_bytes=int(os.environ.get('PDF_CACHE_MAX_BYTES', 64 * 1024 * 1024)),
+    disk_dir=os.environ.get('PDF_CACHE_DIR') or None,
+    max_disk_bytes=int(os.environ.get('PDF_CACHE_MAX_DISK_BYTES', 512 * 1024 * 1024)),
+)
+
+# Stable hash of the sanitized payload plus the template version
+def pdf_cache_key(processed_data, template_version):
+    canonical = json.dumps(processed_data, sort_keys=True, separators=(',', ':'), ensure_ascii=False)
+    digest = hashlib.sha256(template_version.encode('utf-8'))
+    digest.update(canonical.encode('utf-8'))
+    return digest.hexdigest()
+
+# Single-flight: concurrent requests for the same cache key share one build.
+# The first caller (the leader) runs it; the others wait for its result.
+class SingleFlight:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+        self.leaders = 0
+        self.coalesced = 0
+    
+    # Run build(started) for key unless an identical build is already running, in which
+    # case wait for that one. build calls started() once it holds a compile slot.
+    # Returns (result, coalesced). A waiter whose own cancel_event is set stops waiting
+    # with CompileKilled; if the leader was cancelled, the waiters elect a new leader
+    # instead of failing with it. Waiters keep their own admission class: an interactive
+    # waiter gets Overloaded if the leader has no compile slot after the queue timeout,
+    # and a background waiter takes over when an interactive leader was turned away.
+    def do(self, key, build, cancel_event=None, background=False):
+        while True:
+            with self._lock:
+                entry = self._calls.get(key)
+                leader = entry is None
+                if leader:
+                    entry = self._calls[key] = (Future(), threading.Event())
+                    self.leaders += 1
+                else:
+                    self.coalesced += 1
+            call, started = entry
+            if leader:
+                try:
+                    result = build(started.set)
+                except BaseException as e:
+                    self._forget(key, entry)
+                    call.set_exception(e)
+                    raise
+                self._forget(key, entry)
+                call.set_result(result)
+                return result, False
             
-        # Copy the tex file for debugging
-        shutil.copy('resume.tex', os.path.join(original_dir, 'debug_resume.tex'))
+            metrics.inc('resume_coalesced_requests_total')
+            deadline = None if background else time.monotonic() + compile_gate.queue_timeout
+            while True:
+                try:
+                    return call.result(timeout=0.1), True
+                except FutureTimeout:
+                    if cancel_event is not None and cancel_event.is_set():
+                        raise CompileKilled('cancelled')
+                    if deadline is not None and not started.is_set() and time.monotonic() >= deadline:
+                        compile_gate.reject('queue_timeout')
+                except CompileKilled as e:
+                    if e.reason != 'cancelled':
+                        raise
+                    break  # the leader was cancelled; try again
+                except Overloaded:
+                    if not background:
+                        raise
+                    break  # the leader was turned away; background work waits its turn
+    
+    def _forget(self, key, entry):
+        with self._lock:
+            if self._calls.get(key) is entry:
+                del self._calls[key]
+    
+    def stats(self):
+        with self._lock:
+            return {'in_flight': len(self._calls), 'leaders': self.leaders, 'coalesced': self.coalesced}
+
+pdf_flights = SingleFlight()
+
+# Debug capture is off by default so the hot path does no debug I/O. When on,
+# the artifacts of the last DEBUG_CAPTURE_SIZE requests are kept in memory and,
+# with DEBUG_SPILL, also written to DEBUG_DIR/<request_id>/ by a background thread.
+DEBUG_DIR = os.path.abspath(os.environ.get('RESUME_DEBUG_DIR', '.'))
+
+# Atomically write a debug file so readers never see a partial one
+def write_debug_file(path, content):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix='.' + os.path.basename(path) + '.')
+    with os.fdopen(fd, 'w', encoding='utf-8') as f:
+        f.write(content)
+    os.replace(tmp_path, path)
+
+# Bounded in-memory ring buffer of per-request debug artifacts
+class DebugCapture:
+    def __init__(self, enabled=False, size=20, spill=False):
+        self.enabled = enabled
+        self.size = size
+        self.spill = spill
+        self._records = OrderedDict()
+        self._lock = threading.Lock()
+        self._spill_queue = queue.Queue()
+        self._spill_thread = None
+    
+    def configure(self, enabled=None, size=None, spill=None):
+        with self._lock:
+            if enabled is not None:
+                self.enabled = enabled
+            if size is not None:
+                self.size = max(1, size)
+            if spill is not None:
+                self.spill = spill
+            while len(self._records) > self.size:
+                self._records.popitem(last=False)
+            return self.config()
+    
+    def config(self):
+        return {'enabled': self.enabled, 'size': self.size, 'spill': self.spill,
+                'captured': len(self._records), 'spill_dir': DEBUG_DIR}
+    
+    # Store one artifact; strings are kept as-is, anything else is serialized lazily as JSON
+    def record(self, request_id, name, value):
+        if not self.enabled or request_id is None:
+            return
+        with self._lock:
+            entry = self._records.get(request_id)
+            if entry is None:
+                entry = self._records[request_id] = {'created_at': time.time(), 'artifacts': {}}
+                while len(self._records) > self.size:
+                    self._records.popitem(last=False)
+            entry['artifacts'][name] = value
+            spill = self.spill
+        if spill:
+            self._ensure_spill_thread()
+            self._spill_queue.put((request_id, name, value))
+    
+    def summaries(self):
+        with self._lock:
+            return [{'request_id': request_id, 'created_at': entry['created_at'],
+                     'artifacts': sorted(entry['artifacts'])}
+                    for request_id, entry in reversed(self._records.items())]
+    
+    def get(self, request_id):
+        with self._lock:
+            entry = self._records.get(request_id)
+            if entry is None:
+                return None
+            return {name: self.render(value) for name, value in entry['artifacts'].items()}
+    
+    @staticmethod
+    def render(value):
+        return value if isinstance(value, str) else json.dumps(value, indent=2)
+    
+    def _ensure_spill_thread(self):
+        if self._spill_thread is None:
+            with self._lock:
+                if self._spill_thread is None:
+                    self._spill_thread = threading.Thread(target=self._spill_worker, name='debug-spill', daemon=True)
+                    self._spill_thread.start()
+    
+    def _spill_worker(self):
+        while True:
+            request_id, name, value = self._spill_queue.get()
+            path = os.path.abspath(os.path.join(DEBUG_DIR, request_id, name))
+            if os.path.dirname(os.path.dirname(path)) != DEBUG_DIR:
+                app.logger.warning('Not spilling debug artifact outside %s: %s/%s', DEBUG_DIR, request_id, name)
+                continue
+            try:
+                write_debug_file(path, self.render(value))
+            except OSError:
+                app.logger.exception('Could not spill debug artifact %s/%s', request_id, name)
+
+debug_capture = DebugCapture(
+    enabled=os.environ.get('DEBUG_CAPTURE', '0') == '1',
+    size=int(os.environ.get('DEBUG_CAPTURE_SIZE', 20)),
+    spill=os.environ.get('DEBUG_SPILL', '0') == '1',
+)
+
+# Use the caller's X-Request-ID when given, otherwise make one up
+def get_request_id(header_value=None):
+    request_id = request.headers.get('X-Request-ID', '') if header_value is None else header_value
+    # Must start alphanumeric: the ID names debug spill directories, so '.' and '..' are out
+    return request_id if re.fullmatch(r'[A-Za-z0-9][A-Za-z0-9_.-]{0,63}', request_id) else uuid.uuid4().hex
+
+# Reusable compile sandboxes. LATEX_WORKDIR_ROOT can point at a RAM-backed
+# filesystem such as /dev/shm; the default is the system temp directory.
+LATEX_WORKDIR_ROOT = os.environ.get('LATEX_WORKDIR_ROOT') or tempfile.gettempdir()
+SANDBOX_POOL_SIZE = max(1, int(os.environ.get('SANDBOX_POOL_SIZE', os.cpu_count() or 1)))
+
+# Pool of pre-created working directories that are emptied and reused between compiles
+class SandboxPool:
+    def __init__(self, root, size):
+        self.size = size
+        self.base_dir = tempfile.mkdtemp(prefix='resume_sandboxes_', dir=root)
+        self.resets = 0
+        self.reset_seconds = 0.0
+        self.max_reset_seconds = 0.0
+        self.overflows = 0
+        self._lock = threading.Lock()
+        self._free = queue.LifoQueue()  # most recently used first, its inodes are still warm
+        for index in range(size):
+            self._free.put(self._create(f'sandbox_{index}'))
+        atexit.register(shutil.rmtree, self.base_dir, True)
+    
+    def _create(self, name):
+        path = os.path.join(self.base_dir, name)
+        os.mkdir(path)
+        return path
+    
+    # Remove everything pdflatex left behind, keeping the directory itself
+    def _reset(self, path):
+        with os.scandir(path) as entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    shutil.rmtree(entry.path)
+                else:
+                    os.unlink(entry.path)
+    
+    # Take a sandbox; returns (path, pooled) for the matching release()
+    def checkout(self):
+        try:
+            return self._free.get_nowait(), True
+        except queue.Empty:
+            # Pool exhausted: fall back to a throwaway directory rather than waiting
+            with self._lock:
+                self.overflows += 1
+            return tempfile.mkdtemp(prefix='overflow_', dir=self.base_dir), False
+    
+    # Empty a sandbox and return it to the pool (overflow directories are deleted)
+    def release(self, path, pooled):
+        if not pooled:
+            shutil.rmtree(path, ignore_errors=True)
+            return
+        start = time.perf_counter()
+        try:
+            self._reset(path)
+        except OSError:
+            # Could not empty it: replace the sandbox with a fresh one
+            shutil.rmtree(path, ignore_errors=True)
+            path = tempfile.mkdtemp(prefix='sandbox_', dir=self.base_dir)
+        elapsed = time.perf_counter() - start
+        metrics.observe('resume_stage_seconds', elapsed, stage='sandbox_reset')
+        with self._lock:
+            self.resets += 1
+            self.reset_seconds += elapsed
+            self.max_reset_seconds = max(self.max_reset_seconds, elapsed)
+        self._free.put(path)
+    
+    @contextmanager
+    def acquire(self):
+        path, pooled = self.checkout()
+        try:
+            yield path
+        finally:
+            self.release(path, pooled)
+    
+    def stats(self):
+        with self._lock:
+            return {
+                'size': self.size,
+                'free': self._free.qsize(),
+                'base_dir': self.base_dir,
+                'resets': self.resets,
+                'reset_ms_avg': round(self.reset_seconds / self.resets * 1000, 3) if self.resets else 0.0,
+                'reset_ms_max': round(self.max_reset_seconds * 1000, 3),
+                'overflows': self.overflows,
+            }
+
+sandbox_pool = SandboxPool(LATEX_WORKDIR_ROOT, SANDBOX_POOL_SIZE)
+
+# Admission control. A client over its request rate, or a compile that finds the
+# global compile slots busy and the wait queue full, is turned away with a 429.
+RATE_LIMIT_PER_MINUTE = float(os.environ.get('RATE_LIMIT_PER_MINUTE', 60))  # 0 disables per-client limits
+RATE_LIMIT_BURST = max(1, int(os.environ.get('RATE_LIMIT_BURST', 10)))
+# Clients tracked at once; the least recently seen bucket is dropped beyond this
+RATE_LIMIT_MAX_CLIENTS = max(1, int(os.environ.get('RATE_LIMIT_MAX_CLIENTS', 10000)))
+# Known API keys get a bucket of their own; anything else is limited by client address
+RATE_LIMIT_API_KEYS = frozenset(key for key in os.environ.get('RATE_LIMIT_API_KEYS', '').split(',') if key)
+# Trusted proxies in front of the service that append to X-Forwarded-For (0: ignore
+# the header). The client address is the entry the outermost of them added; anything
+# further left was written by the client and cannot be trusted.
+RATE_LIMIT_TRUST_PROXY = max(0, int(os.environ.get('RATE_LIMIT_TRUST_PROXY', 0)))
+MAX_CONCURRENT_COMPILES = max(1, int(os.environ.get('MAX_CONCURRENT_COMPILES', SANDBOX_POOL_SIZE)))
+# Compiles allowed to wait for a slot, and for how long, before requests get 429
+COMPILE_QUEUE_LIMIT = max(0, int(os.environ.get('COMPILE_QUEUE_LIMIT', MAX_CONCURRENT_COMPILES * 2)))
+COMPILE_QUEUE_TIMEOUT = float(os.environ.get('COMPILE_QUEUE_TIMEOUT', 5))
+
+class Overloaded(Exception):
+    def __init__(self, reason, retry_after):
+        super().__init__(f'Service is busy ({reason}), retry in {retry_after} s')
+        self.reason = reason
+        self.retry_after = retry_after
+
+# One token bucket per client: `burst` requests at once, refilled at `per_minute`
+class RateLimiter:
+    def __init__(self, per_minute, burst, max_clients):
+        self.rate = per_minute / 60.0
+        self.burst = burst
+        self.max_clients = max_clients
+        self.rejected = 0
+        self._lock = threading.Lock()
+        self._buckets = OrderedDict()  # client -> (tokens, updated_at)
+    
+    # Take cost tokens from client's bucket, or raise Overloaded with the wait until they refill
+    def consume(self, client, cost=1):
+        if self.rate <= 0:
+            return
+        cost = min(cost, self.burst)
+        now = time.monotonic()
+        with self._lock:
+            tokens, updated_at = self._buckets.pop(client, (self.burst, now))
+            tokens = min(self.burst, tokens + (now - updated_at) * self.rate)
+            allowed = tokens >= cost
+            if allowed:
+                tokens -= cost
+            else:
+                self.rejected += 1
+            self._buckets[client] = (tokens, now)
+            while len(self._buckets) > self.max_clients:
+                self._buckets.popitem(last=False)
+        if not allowed:
+            metrics.inc('resume_rejected_requests_total', reason='rate_limited')
+            raise Overloaded('rate_limited', max(1, math.ceil((cost - tokens) / self.rate)))
+    
+    def stats(self):
+        with self._lock:
+            return {
+                'per_minute': self.rate * 60,
+                'burst': self.burst,
+                'clients': len(self._buckets),
+                'rejected': self.rejected,
+            }
+
+# Global cap on compiles running at once, with a short bounded queue in front of it
+class CompileGate:
+    def __init__(self, limit, queue_limit, queue_timeout):
+        self.limit = limit
+        self.queue_limit = queue_limit
+        self.queue_timeout = queue_timeout
+        self.running = 0
+        self.waiting = 0
+        self.rejected = 0
+        self._condition = threading.Condition()
+        self._seconds_avg = 2.0  # moving average of slot hold time, for Retry-After
+    
+    # Seconds until a slot is likely to free up for a newcomer
+    def retry_after(self):
+        return max(1, math.ceil((self.waiting + 1) / self.limit * self._seconds_avg))
+    
+    def _reject(self, reason):
+        self.rejected += 1
+        metrics.inc('resume_rejected_requests_total', reason=reason)
+        raise Overloaded(reason, self.retry_after())
+    
+    # Turn away a request that waits for a slot outside slot() (a coalesced waiter)
+    def reject(self, reason):
+        with self._condition:
+            self._reject(reason)
+    
+    # Hold a compile slot. Interactive callers wait at most queue_timeout behind at most
+    # queue_limit others, then get Overloaded; background callers (jobs, batches) are
+    # already bounded by their worker pool and simply wait, until cancel_event is set.
+    @contextmanager
+    def slot(self, background=False, cancel_event=None):
+        with self._condition:
+            if self.running >= self.limit:
+                if not background and self.waiting >= self.queue_limit:
+                    self._reject('queue_full')
+                deadline = time.monotonic() + self.queue_timeout
+                self.waiting += 1
+                try:
+                    while self.running >= self.limit:
+                        if cancel_event is not None and cancel_event.is_set():
+                            raise CompileKilled('cancelled')
+                        remaining = deadline - time.monotonic()
+                        if not background and remaining <= 0:
+                            self._reject('queue_timeout')
+                        self._condition.wait(min(0.1, remaining) if not background else 0.1)
+                finally:
+                    self.waiting -= 1
+            self.running += 1
+        started_at = time.perf_counter()
+        try:
+            yield
+        finally:
+            with self._condition:
+                self.running -= 1
+                self._seconds_avg = 0.8 * self._seconds_avg + 0.2 * (time.perf_counter() - started_at)
+                self._condition.notify()
+    
+    def stats(self):
+        with self._condition:
+            return {
+                'limit': self.limit,
+                'running': self.running,
+                'waiting': self.waiting,
+                'queue_limit': self.queue_limit,
+                'queue_timeout_s': self.queue_timeout,
+                'rejected': self.rejected,
+            }
+
+rate_limiter = RateLimiter(RATE_LIMIT_PER_MINUTE, RATE_LIMIT_BURST, RATE_LIMIT_MAX_CLIENTS)
+compile_gate = CompileGate(MAX_CONCURRENT_COMPILES, COMPILE_QUEUE_LIMIT, COMPILE_QUEUE_TIMEOUT)
+
+# Who a request is rate limited as: its API key if it is a known one, else its address
+def rate_limit_client(api_key=None, remote_addr=None, forwarded_for=None):
+    if api_key and api_key in RATE_LIMIT_API_KEYS:
+        return 'key:' + hashlib.sha256(api_key.encode('utf-8')).hexdigest()[:16]
+    if RATE_LIMIT_TRUST_PROXY and forwarded_for:
+        hops = [hop.strip() for hop in forwarded_for.split(',')]
+        if len(hops) >= RATE_LIMIT_TRUST_PROXY and hops[-RATE_LIMIT_TRUST_PROXY]:
+            return 'ip:' + hops[-RATE_LIMIT_TRUST_PROXY]
+    return 'ip:' + (remote_addr or 'unknown')
+
+# Render and compile one resume in a private sandbox from the pool.
+# Nothing outside the sandbox is touched and the PDF comes back in memory.
+def build_resume_pdf(processed_data, template_entry, timer=None, cancel_event=None):
+    timer = timer or StageTimer()
+    with sandbox_pool.acquire() as work_dir:
+        # Render the precompiled LaTeX template with the provided data
+        with timer.stage('render'):
+            rendered_tex = template_entry['template'].render(**processed_data)
         
-        # Compile the LaTeX file to PDF using pdflatex with nonstopmode
-        process = subprocess.run(
-            ['pdflatex', '-interaction=nonstopmode', 'resume.tex'], 
-            capture_output=True, 
-            text=True,
-            check=False  # Don't raise an exception on non-zero return
-        )
+        # Compile the document against the precompiled preamble format
+        metrics.inc('resume_compiles_in_flight')
+        try:
+            process, passes = compile_latex(rendered_tex, work_dir, template_entry['format'], timer, cancel_event,
+                                            asset_dir=template_entry['assets'])
+        finally:
+            metrics.inc('resume_compiles_in_flight', -1)
+        return collect_build_result(work_dir, rendered_tex, process, passes, timer)
+
+# Build result of a finished compile: {'pdf', 'tex', 'log', 'passes'}. The PDF
+# (if one was generated) is read here, before the sandbox is reset.
+def collect_build_result(work_dir, rendered_tex, process, passes, timer):
+    result = {
+        'pdf': None,
+        'tex': rendered_tex,
+        'log': process.stdout + process.stderr,
+        'passes': passes,
+    }
+    pdf_path = os.path.join(work_dir, 'resume.pdf')
+    if os.path.exists(pdf_path):
+        with timer.stage('read_pdf'), open(pdf_path, 'rb') as f:
+            result['pdf'] = f.read()
+    return result
+
+# HTML version of LATEX_TEMPLATE for the native renderer, laid out by PyMuPDF's
+# Story engine: same sections, colors, two-column blocks and footer, minus the icons
+NATIVE_TEMPLATE = """
+<table class="header"><tr>
+<td class="identity" width="60%">
+<p class="name">{{ Full_Name }}</p>
+<p class="designation">{{ Designation }}</p>
+</td>
+<td class="contact" width="40%">
+<p>{{ Email }}</p>
+<p>{{ Mobile }}</p>
+<p>{{ Location }}</p>
+<p class="link">{{ Linkedin_url }}</p>
+<p class="link">{{ github_url }}</p>
+</td>
+</tr></table>
+<div class="rule"></div>
+
+<h1>PROFESSIONAL SUMMARY</h1>
+<p>{{ summary }}</p>
+
+<h1>TECHNICAL SKILLS</h1>
+{% set categories = skills_data.items() | list %}
+{% set half = (categories | length + 1) // 2 %}
+<table class="columns"><tr>
+{% for column in [categories[:half], categories[half:]] %}
+<td>
+{% for category, skills in column %}
+<h2>{{ category }}</h2>
+<ul>{% for skill in skills %}<li>{{ skill }}</li>{% endfor %}</ul>
+{% endfor %}
+</td>
+{% endfor %}
+</tr></table>
+
+{% macro entry(title, duration, subtitle, aside, points, spacing) %}
+<table><tr><td class="title">{{ title }}</td><td class="aside"><i>{{ duration }}</i></td></tr>
+<tr><td><i>{{ subtitle }}</i></td><td class="aside">{{ aside }}</td></tr></table>
+<ul class="{{ spacing }}">{% for point in points %}<li>{{ point }}</li>{% endfor %}</ul>
+{% endmacro %}
+
+<h1>PROFESSIONAL EXPERIENCE</h1>
+{% for job in experience %}
+{{ entry(job.title, job.duration, job.company, job.location, job.responsibilities, 'spaced') }}
+{% endfor %}
+
+<h1>NOTABLE PROJECTS</h1>
+{% for project in projects %}
+{{ entry(project.title, project.duration, project.link, project.type, project.details, 'spaced') }}
+{% endfor %}
+
+<h1>EDUCATION</h1>
+{% for degree in education %}
+{{ entry(degree.title, degree.duration, degree.university, degree.gpa, degree.details, 'tight') }}
+{% endfor %}
+
+<h1>CERTIFICATIONS &amp; ACHIEVEMENTS</h1>
+<table class="columns"><tr>
+<td><ul>{% for cert in certifications %}<li>{{ cert }}</li>{% endfor %}</ul></td>
+<td><ul>{% for achievement in achievements %}<li>{{ achievement }}</li>{% endfor %}</ul></td>
+</tr></table>
+
+<p class="closing">References available upon request</p>
+"""
+
+# Colors and spacing from the LaTeX preamble (primary, secondary, titlesec spacing)
+NATIVE_CSS = """
+* { font-family: serif; font-size: 11pt; line-height: 1.2; }
+p { margin: 0; }
+table { width: 100%; border-collapse: collapse; }
+td { vertical-align: top; padding: 0; }
+.name { font-size: 22pt; font-weight: bold; color: #004F80; margin-bottom: 4pt; }
+.designation { font-size: 14pt; color: #3278B4; }
+.contact { text-align: right; }
+.link { color: #3278B4; }
+.rule { border-top: 1.5pt solid #004F80; margin: 10pt 0 4pt 0; }
+h1 { font-size: 14pt; font-weight: bold; color: #004F80; border-bottom: 1pt solid #004F80; margin: 12pt 0 6pt 0; }
+h2 { font-size: 11pt; font-weight: bold; color: #3278B4; margin: 8pt 0 4pt 0; }
+.columns td { width: 50%; padding-right: 10pt; }
+.title { font-weight: bold; color: #004F80; }
+.aside { text-align: right; }
+ul { margin: 2pt 0 0 0; padding-left: 12pt; }
+li { margin-bottom: 2pt; }
+ul.spaced { margin-bottom: 8pt; }
+ul.tight { margin-bottom: 4pt; }
+.closing { text-align: center; font-style: italic; color: #3278B4; margin-top: 4pt; }
+"""
+
+native_template = html_jinja_env.from_string(NATIVE_TEMPLATE)
+# Part of the native cache keys, so a layout change never serves stale PDFs
+NATIVE_TEMPLATE_VERSION = 'native-' + hashlib.sha256((NATIVE_TEMPLATE + NATIVE_CSS).encode('utf-8')).hexdigest()[:16]
+
+# Letter paper with the template's 0.7in margins, in points
+NATIVE_PAGE_SIZE = (612, 792)
+NATIVE_MARGIN = 0.7 * 72
+
+# MuPDF is not thread-safe, so native renders run one at a time (each takes tens of ms)
+_native_render_lock = threading.Lock()
+
+# Draw the resume straight to PDF with PyMuPDF, no LaTeX involved.
+# Takes the raw payload (HTML escaping is done by the template) and
+# returns (html, pdf_bytes). Fonts are subset so CJK fallbacks stay small.
+def render_native_pdf(data):
+    html = native_template.render(**data)
+    page_rect = fitz.Rect(0, 0, *NATIVE_PAGE_SIZE)
+    body_rect = page_rect + (NATIVE_MARGIN, NATIVE_MARGIN, -NATIVE_MARGIN, -NATIVE_MARGIN)
+    with _native_render_lock:
+        story = fitz.Story(html, user_css=NATIVE_CSS)
+        buffer = io.BytesIO()
+        writer = fitz.DocumentWriter(buffer)
+        more = True
+        while more:
+            device = writer.begin_page(page_rect)
+            more, _ = story.place(body_rect)
+            story.draw(device)
+            writer.end_page()
+        writer.close()
         
-        # Save the log for debugging regardless of success
-        with open(os.path.join(original_dir, 'latex_compile.log'), 'w') as f:
-            f.write(process.stdout)
-            f.write(process.stderr)
+        # Centered page numbers, like \fancyfoot[C]{\thepage}
+        with fitz.open('pdf', buffer.getvalue()) as doc:
+            for number, page in enumerate(doc, 1):
+                label = str(number)
+                width = fitz.get_text_length(label, fontname='tiro', fontsize=10)
+                page.insert_text(((page_rect.width - width) / 2, page_rect.height - NATIVE_MARGIN / 2),
+                                 label, fontname='tiro', fontsize=10)
+            doc.set_metadata({'author': str(data.get('Full_Name') or ''), 'title': 'Software Engineer Resume'})
+            doc.subset_fonts()
+            pdf = doc.tobytes(garbage=3, deflate=True)
+    return html, pdf
+
+# Native counterpart of the LaTeX half of generate_pdf(): cache lookup, draw, store.
+# The cache key covers the raw payload and the native layout version.
+def generate_native_pdf(data, request_id=None, known_etags=(), timer=None, background=False):
+    timer = timer or StageTimer()
+    with timer.stage('cache_lookup'):
+        cache_key = pdf_cache_key(data, NATIVE_TEMPLATE_VERSION)
+        if cache_key in known_etags:
+            return {'pdf': None, 'passes': 0, 'etag': cache_key, 'not_modified': True}
+        pdf = pdf_cache.get(cache_key)
+    if pdf is not None:
+        return {'pdf': pdf, 'passes': 0, 'etag': cache_key}
+    
+    def build(started):
+        queued_at = time.perf_counter()
+        with compile_gate.slot(background):
+            started()
+            timer.record('compile_wait', time.perf_counter() - queued_at)
+            with timer.stage('native_render'):
+                html, pdf = render_native_pdf(data)
+        debug_capture.record(request_id, 'debug_resume.html', html)
+        with timer.stage('cache_store'):
+            pdf_cache.put(cache_key, pdf)
+        return {'pdf': pdf, 'passes': 0, 'etag': cache_key}
+    
+    with timer.stage('native_build'):
+        result, _ = pdf_flights.do(cache_key, build, background=background)
+    return result
+
+# Full pipeline for one payload (already checked by validate_payload): sanitize,
+# cache lookup, render and compile.
+# Returns {'pdf': bytes or None, 'passes': int, 'etag': str}; progress(stage) is told
+# when compiling starts. The ETag is the cache key, so if it is already in known_etags
+# (the client's If-None-Match) nothing is compiled and 'not_modified' is set.
+# Stage timings are recorded on timer when one is given. Setting cancel_event kills the
+# compile and raises CompileKilled, as does running past LATEX_TIMEOUT_SECONDS.
+# data['template'] picks the LaTeX layout from the registry. engine='native' draws the
+# PDF with PyMuPDF instead (see render_native_pdf), which has a single layout.
+# Builds take a compile_gate slot; unless background is set, a full wait queue raises Overloaded.
+def generate_pdf(data, progress=None, request_id=None, known_etags=(), timer=None, cancel_event=None,
+                 engine='latex', background=False):
+    timer = timer or StageTimer()
+    
+    # Keep a copy of the data for debugging
+    debug_capture.record(request_id, 'debug_input.json', data)
+    if engine == 'native':
+        return generate_native_pdf(data, request_id, known_etags, timer, background)
+    
+    lookup = lookup_pdf(data, request_id, known_etags, timer)
+    if lookup['result'] is not None:
+        return lookup['result']
+    
+    if progress:
+        progress('compiling')
+    
+    # Identical payloads already compiling are waited for rather than compiled again
+    def build(started):
+        queued_at = time.perf_counter()
+        with compile_gate.slot(background, cancel_event):
+            started()
+            build_started_at = time.perf_counter()
+            timer.record('compile_wait', build_started_at - queued_at)
+            result = build_resume_pdf(lookup['processed_data'], lookup['template_entry'], timer, cancel_event)
+        return store_pdf(result, lookup, request_id, timer, time.perf_counter() - build_started_at)
+    
+    coalesced_started_at = time.perf_counter()
+    result, coalesced = pdf_flights.do(lookup['cache_key'], build, cancel_event, background)
+    if coalesced:
+        timer.record('coalesced_wait', time.perf_counter() - coalesced_started_at)
+    return result
+
+# First half of generate_pdf(): sanitize and look the payload up in the PDF cache.
+# The returned 'result' is the final answer on a cache hit or an If-None-Match
+# match, and None when the PDF still has to be built.
+def lookup_pdf(data, request_id=None, known_etags=(), timer=None):
+    # Process and sanitize all data
+    with timer.stage('sanitize'):
+        processed_data = process_data(data)
+    debug_capture.record(request_id, 'debug_processed.json', processed_data)
+    
+    # Serve repeated payloads straight from the PDF cache
+    template_name = data.get('template', DEFAULT_TEMPLATE)
+    lookup = {'processed_data': processed_data, 'template_name': template_name, 'result': None}
+    with timer.stage('cache_lookup'):
+        lookup['template_entry'] = get_latex_template(template_name)
+        lookup['cache_key'] = cache_key = pdf_cache_key(processed_data, lookup['template_entry']['version'])
+        if cache_key in known_etags:
+            metrics.inc('resume_template_requests_total', template=template_name, result='not_modified')
+            lookup['result'] = {'pdf': None, 'passes': 0, 'etag': cache_key, 'not_modified': True}
+            return lookup
+        pdf = pdf_cache.get(cache_key)
+    if pdf is not None:
+        metrics.inc('resume_template_requests_total', template=template_name, result='cache_hit')
+        lookup['result'] = {'pdf': pdf, 'passes': 0, 'etag': cache_key}
+    return lookup
+
+# Second half of generate_pdf(): account for a fresh build, keep its debug
+# artifacts and cache the PDF. Returns the final {'pdf', 'passes', 'etag'}.
+def store_pdf(result, lookup, request_id, timer, build_seconds):
+    template_name, cache_key = lookup['template_name'], lookup['cache_key']
+    metrics.observe('resume_template_build_seconds', build_seconds, template=template_name)
+    metrics.inc('resume_template_requests_total', template=template_name,
+                result='compiled' if result['pdf'] is not None else 'failed')
+    
+    # Keep the rendered document and log for debugging regardless of success
+    debug_capture.record(request_id, 'debug_resume.tex', result['tex'])
+    debug_capture.record(request_id, 'latex_compile.log', result['log'])
+    
+    # Store the PDF in the cache for repeated requests
+    if result['pdf'] is not None:
+        with timer.stage('cache_store'):
+            pdf_cache.put(cache_key, result['pdf'])
+    else:
+        app.logger.warning('pdflatex produced no PDF for request %s:\n%s', request_id, result['log'][-2000:])
+    return {'pdf': result['pdf'], 'passes': result['passes'], 'etag': cache_key}
+
+# Where a failed request's debug artifacts can be found
+def debug_hint(request_id):
+    if debug_capture.enabled:
+        return f'See /debug/requests/{request_id} for details'
+    return f'Request {request_id}; see the server log, or enable debug capture for full artifacts'
+
+# Send a generated PDF straight from memory (Content-Length is set from the bytes).
+# Conditional requests whose If-None-Match matches the ETag get a 304.
+def pdf_response(pdf, passes, etag, server_timing=None):
+    response = app.response_class(pdf, mimetype='application/pdf')
+    response.headers['Content-Disposition'] = 'attachment; filename=resume.pdf'
+    response.headers['X-LaTeX-Passes'] = str(passes)
+    if SERVER_TIMING and server_timing:
+        response.headers['Server-Timing'] = server_timing
+    response.set_etag(etag)
+    
+    # The body is written by the WSGI server after we return; time it until close
+    sent_at = time.perf_counter()
+    response.call_on_close(
+        lambda: metrics.observe('resume_stage_seconds', time.perf_counter() - sent_at, stage='send')
+    )
+    return response.make_conditional(request)
+
+# 304 for a client that already holds this exact output
+def not_modified_response(etag):
+    response = app.response_class(status=304)
+    response.set_etag(etag)
+    return response
+
+# 400 listing every field that failed validation
+def invalid_payload_response(e, request_id=None):
+    body = {'error': 'Invalid resume payload', 'fields': e.errors}
+    if request_id:
+        body['request_id'] = request_id
+    return jsonify(body), 400
+
+# Charge this request's client cost tokens; raises Overloaded when it is over its rate
+def admit_request(cost=1):
+    client = rate_limit_client(request.headers.get('X-API-Key'), request.remote_addr,
+                               request.headers.get('X-Forwarded-For'))
+    rate_limiter.consume(client, cost)
+
+# 429 telling the client when to come back
+def overloaded_response(e, request_id=None):
+    body = {'error': str(e), 'reason': e.reason}
+    if request_id:
+        body['request_id'] = request_id
+    response = jsonify(body)
+    response.status_code = 429
+    response.headers['Retry-After'] = str(e.retry_after)
+    return response
+
+# Log the error details and build the JSON error response
+def error_response(e, request_id):
+    import traceback
+    error_details = traceback.format_exc()
+    app.logger.error('Request %s failed: %s\n%s', request_id, e, error_details)
+    debug_capture.record(request_id, 'error.log', str(e) + '\n' + error_details)
+    return jsonify({
+        'error': str(e),
+        'request_id': request_id,
+        'details': debug_hint(request_id)
+    }), 500
+
+# Count a finished request and its end-to-end latency
+def record_request(endpoint, outcome, started_at):
+    metrics.inc('resume_requests_total', endpoint=endpoint, outcome=outcome)
+    metrics.observe('resume_request_seconds', time.perf_counter() - started_at, endpoint=endpoint)
+
+# Renderers selectable per request with ?engine=
+RENDER_ENGINES = ('latex', 'native')
+
+# The ?engine= of this request, as (engine, None) or (None, error message)
+def get_render_engine(engine=None):
+    engine = engine or request.args.get('engine', 'latex')
+    if engine not in RENDER_ENGINES:
+        return None, f"Unknown engine '{engine}', expected one of: {', '.join(RENDER_ENGINES)}"
+    if engine == 'native' and fitz is None:
+        return None, 'The native engine requires PyMuPDF, which is not installed'
+    return engine, None
+
+@app.route('/generate_resume', methods=['POST'])
+def generate_resume():
+    started_at = time.perf_counter()
+    request_id = get_request_id()
+    engine, engine_error = get_render_engine()
+    if engine_error:
+        return jsonify({'error': engine_error, 'request_id': request_id}), 400
+    timer = StageTimer()
+    try:
+        # Turn away clients over their rate before doing any work for them
+        admit_request()
         
-        # Try a second compilation to resolve references (if first one succeeded)
-        if process.returncode == 0:
-            subprocess.run(
-                ['pdflatex', '-interaction=nonstopmode', 'resume.tex'],
-                check=False
-            )
+        # Get form data from request and reject malformed payloads before any rendering
+        with timer.stage('parse'):
+            data = request.get_json(silent=True)
+        with timer.stage('validate'):
+            data = validate_payload(data)
+        result = generate_pdf(data, request_id=request_id, known_etags=request.if_none_match, timer=timer,
+                              engine=engine)
+        if result.get('not_modified'):
+            record_request('generate_resume', 'not_modified', started_at)
+            return not_modified_response(result['etag'])
         
         # Check if PDF was generated
-        if not os.path.exists('resume.pdf'):
-            os.chdir(original_dir)
-            shutil.rmtree(temp_dir)
+        if result['pdf'] is None:
+            record_request('generate_resume', 'failure', started_at)
             return jsonify({
                 'error': 'Failed to generate PDF', 
-                'details': 'Check latex_compile.log for details'
+                'request_id': request_id,
+                'details': debug_hint(request_id)
             }), 500
         
-        # Copy the PDF to a known location in the original directory
-        shutil.copy('resume.pdf', os.path.join(original_dir, 'resume.pdf'))
-        
-        # Change back to the original directory and clean up
-        os.chdir(original_dir)
-        shutil.rmtree(temp_dir)
-        
-        # Return the PDF file
-        return send_file('resume.pdf', as_attachment=True)
+        # Return the PDF from memory
+        response = pdf_response(result['pdf'], result['passes'], result['etag'], timer.server_timing())
+        response.headers['X-Request-ID'] = request_id
+        record_request('generate_resume', 'success', started_at)
+        return response
+    
+    except InvalidPayload as e:
+        record_request('generate_resume', 'invalid', started_at)
+        return invalid_payload_response(e, request_id)
+    
+    except Overloaded as e:
+        record_request('generate_resume', 'rejected', started_at)
+        return overloaded_response(e, request_id)
+    
+    except CompileKilled as e:
+        record_request('generate_resume', 'killed', started_at)
+        return jsonify({'error': str(e), 'request_id': request_id}), 504
     
     except Exception as e:
+        record_request('generate_resume', 'failure', started_at)
+        return error_response(e, request_id)
+
+# Async job API: compiles run on a bounded worker pool sized to the cores
+COMPILE_WORKERS = max(1, int(os.environ.get('COMPILE_WORKERS', os.cpu_count() or 1)))
+# Queued plus running jobs allowed before new submissions get 429
+JOB_QUEUE_LIMIT = max(1, int(os.environ.get('JOB_QUEUE_LIMIT', COMPILE_WORKERS * 4)))
+# Finished jobs (and their PDFs) are kept this long for download
+JOB_TTL_SECONDS = int(os.environ.get('JOB_TTL_SECONDS', 600))
+
+compile_pool = ThreadPoolExecutor(max_workers=COMPILE_WORKERS, thread_name_prefix='compile')
+_jobs_lock = threading.Lock()
+_jobs = {}
+_job_cancel_events = {}
+# Moving average of job run time, used to estimate Retry-After
+_job_seconds_avg = 2.0
+
+# Update a job's fields under the jobs lock
+def update_job(job, **fields):
+    with _jobs_lock:
+        job.update(fields)
+
+# Worker-side body of a job
+def run_job(job, data, cancel_event, engine='latex'):
+    global _job_seconds_avg
+    with _jobs_lock:
+        if cancel_event.is_set():
+            return
+        job.update(status='running', stage='rendering', started_at=time.time())
+    timer = StageTimer()
+    timer.record('queue', job['started_at'] - job['created_at'])
+    try:
+        result = generate_pdf(data, progress=lambda stage: update_job(job, stage=stage), request_id=job['id'],
+                              timer=timer, cancel_event=cancel_event, engine=engine, background=True)
+        if result['pdf'] is None:
+            metrics.inc('resume_requests_total', endpoint='jobs', outcome='failure')
+            update_job(job, status='failed', stage='done',
+                       error='Failed to generate PDF. ' + debug_hint(job['id']))
+        else:
+            metrics.inc('resume_requests_total', endpoint='jobs', outcome='success')
+            update_job(job, status='done', stage='done', pdf=result['pdf'], passes=result['passes'],
+                       etag=result['etag'], server_timing=timer.server_timing())
+    except CompileKilled as e:
+        metrics.inc('resume_requests_total', endpoint='jobs', outcome='killed')
+        update_job(job, status='cancelled' if e.reason == 'cancelled' else 'failed', stage='done', error=str(e))
+    except Exception as e:
+        metrics.inc('resume_requests_total', endpoint='jobs', outcome='failure')
         import traceback
-        error_details = traceback.format_exc()
-        
-        # Write error details to a log file
-        with open('error.log', 'w') as f:
-            f.write(str(e) + '\n')
-            f.write(error_details)
-            
-        return jsonify({
-            'error': str(e),
-            'details': 'Check error.log for more information'
-        }), 500
+        app.logger.error('Job %s failed: %s\n%s', job['id'], e, traceback.format_exc())
+        debug_capture.record(job['id'], 'error.log', str(e) + '\n' + traceback.format_exc())
+        update_job(job, status='failed', stage='done', error=str(e))
+    finally:
+        with _jobs_lock:
+            job['finished_at'] = time.time()
+            _job_cancel_events.pop(job['id'], None)
+            _job_seconds_avg = 0.8 * _job_seconds_avg + 0.2 * (job['finished_at'] - job['started_at'])
+
+# Drop finished jobs older than JOB_TTL_SECONDS (caller holds _jobs_lock)
+def prune_jobs():
+    cutoff = time.time() - JOB_TTL_SECONDS
+    for job_id in [job_id for job_id, job in _jobs.items()
+                   if job['finished_at'] and job['finished_at'] < cutoff]:
+        del _jobs[job_id]
+        _job_cancel_events.pop(job_id, None)
+
+# Public view of a job (everything except the PDF bytes)
+def job_status(job):
+    status = {key: value for key, value in job.items() if key != 'pdf'}
+    status['status_url'] = f"/jobs/{job['id']}"
+    if job['status'] == 'done':
+        status['pdf_url'] = f"/jobs/{job['id']}/pdf"
+    return status
+
+@app.route('/jobs', methods=['POST'])
+def submit_job():
+    try:
+        admit_request()
+    except Overloaded as e:
+        return overloaded_response(e)
+    try:
+        data = validate_payload(request.get_json(silent=True))
+    except InvalidPayload as e:
+        metrics.inc('resume_requests_total', endpoint='jobs', outcome='invalid')
+        return invalid_payload_response(e)
+    engine, engine_error = get_render_engine()
+    if engine_error:
+        return jsonify({'error': engine_error}), 400
+    
+    with _jobs_lock:
+        prune_jobs()
+        pending = sum(1 for job in _jobs.values() if job['status'] in ('queued', 'running'))
+        if pending >= JOB_QUEUE_LIMIT:
+            retry_after = max(1, math.ceil(pending / COMPILE_WORKERS * _job_seconds_avg))
+            response = jsonify({'error': 'Too many pending jobs', 'pending': pending})
+            response.status_code = 429
+            response.headers['Retry-After'] = str(retry_after)
+            return response
+        job = {
+            'id': uuid.uuid4().hex,
+            'status': 'queued',
+            'stage': 'queued',
+            'created_at': time.time(),
+            'started_at': None,
+            'finished_at': None,
+            'passes': None,
+            'etag': None,
+            'server_timing': None,
+            'error': None,
+            'pdf': None,
+        }
+        _jobs[job['id']] = job
+        cancel_event = _job_cancel_events[job['id']] = threading.Event()
+    
+    compile_pool.submit(run_job, job, data, cancel_event, engine)
+    with _jobs_lock:
+        response = jsonify(job_status(job))
+    response.status_code = 202
+    response.headers['Location'] = f"/jobs/{job['id']}"
+    return response
+
+@app.route('/jobs/<job_id>', methods=['GET'])
+def get_job(job_id):
+    with _jobs_lock:
+        job = _jobs.get(job_id)
+        if job is None:
+            return jsonify({'error': 'Unknown job'}), 404
+        return jsonify(job_status(job))
+
+@app.route('/jobs/<job_id>', methods=['DELETE'])
+def cancel_job(job_id):
+    with _jobs_lock:
+        job = _jobs.get(job_id)
+        if job is None:
+            return jsonify({'error': 'Unknown job'}), 404
+        if job['status'] in ('queued', 'running'):
+            # A running compile notices the event within ~100 ms and kills pdflatex
+            _job_cancel_events[job_id].set()
+            if job['status'] == 'queued':
+                job.update(status='cancelled', stage='done', finished_at=time.time())
+        return jsonify(job_status(job))
+
+@app.route('/jobs/<job_id>/pdf', methods=['GET'])
+def get_job_pdf(job_id):
+    with _jobs_lock:
+        job = _jobs.get(job_id)
+        if job is None:
+            return jsonify({'error': 'Unknown job'}), 404
+        status, pdf, passes, etag, error = job['status'], job['pdf'], job['passes'], job['etag'], job['error']
+        server_timing = job['server_timing']
+    
+    if status == 'failed':
+        return jsonify({'error': error}), 500
+    if status == 'cancelled':
+        return jsonify({'error': 'Job was cancelled'}), 410
+    if status != 'done':
+        return jsonify({'error': 'Job not finished', 'status': status}), 409
+    return pdf_response(pdf, passes, etag, server_timing)
+
+# Largest number of payloads accepted by one batch request
+BATCH_MAX_ITEMS = max(1, int(os.environ.get('BATCH_MAX_ITEMS', 50)))
+
+# Write-only sink that lets zipfile stream into an HTTP response
+class ZipStream(io.RawIOBase):
+    def __init__(self):
+        self._chunks = []
+    
+    def writable(self):
+        return True
+    
+    def write(self, b):
+        self._chunks.append(bytes(b))
+        return len(b)
+    
+    # Hand over everything written since the last drain
+    def drain(self):
+        data = b''.join(self._chunks)
+        self._chunks.clear()
+        return data
+
+# File name for a batch item inside the ZIP
+def batch_item_filename(index, data):
+    name = data.get('Full_Name') if isinstance(data, dict) else None
+    slug = re.sub(r'[^A-Za-z0-9]+', '_', str(name or '')).strip('_')[:40]
+    return f'{index:03d}_{slug or "resume"}.pdf'
+
+# Generate one batch item, turning every failure into a manifest entry
+def run_batch_item(index, data, request_id=None, cancel_event=None, engine='latex'):
+    entry = {'index': index, 'filename': batch_item_filename(index, data), 'status': 'failed'}
+    if not isinstance(data, dict):
+        entry['error'] = 'Item must be a JSON object'
+        return entry, None
+    try:
+        if cancel_event is not None and cancel_event.is_set():
+            raise CompileKilled('cancelled')
+        data = validate_payload(data)
+        result = generate_pdf(data, request_id=request_id, cancel_event=cancel_event, engine=engine, background=True)
+    except InvalidPayload as e:
+        metrics.inc('resume_requests_total', endpoint='batch_item', outcome='invalid')
+        entry.update(error='Invalid resume payload', fields=e.errors)
+        return entry, None
+    except Exception as e:
+        metrics.inc('resume_requests_total', endpoint='batch_item', outcome='failure')
+        entry['error'] = str(e)
+        return entry, None
+    if result['pdf'] is None:
+        metrics.inc('resume_requests_total', endpoint='batch_item', outcome='failure')
+        entry['error'] = 'Failed to generate PDF'
+        return entry, None
+    metrics.inc('resume_requests_total', endpoint='batch_item', outcome='success')
+    entry.update(status='ok', passes=result['passes'], size=len(result['pdf']))
+    return entry, result['pdf']
+
+@app.route('/generate_resume/batch', methods=['POST'])
+def generate_resume_batch():
+    data = request.get_json(silent=True)
+    items = data.get('items') if isinstance(data, dict) else data
+    if not isinstance(items, list) or not items:
+        return jsonify({'error': 'Request body must be a non-empty list of payloads (or {"items": [...]})'}), 400
+    if len(items) > BATCH_MAX_ITEMS:
+        return jsonify({'error': f'Batch is limited to {BATCH_MAX_ITEMS} items'}), 413
+    try:
+        # Each item counts against the client's rate (up to a full burst)
+        admit_request(len(items))
+    except Overloaded as e:
+        return overloaded_response(e)
+    engine, engine_error = get_render_engine()
+    if engine_error:
+        return jsonify({'error': engine_error}), 400
+    
+    # Compile every item in parallel on the shared worker pool
+    batch_id = get_request_id()
+    cancel_event = threading.Event()
+    futures = [compile_pool.submit(run_batch_item, index, item, f'{batch_id}-{index:03d}', cancel_event, engine)
+               for index, item in enumerate(items)]
+    
+    # Stream each PDF into the ZIP as soon as it finishes, manifest last
+    def stream():
+        sink = ZipStream()
+        manifest = []
+        try:
+            with zipfile.ZipFile(sink, 'w', compression=zipfile.ZIP_STORED) as archive:
+                for future in as_completed(futures):
+                    entry, pdf = future.result()
+                    manifest.append(entry)
+                    if pdf is not None:
+                        archive.writestr(entry['filename'], pdf)
+                        yield sink.drain()
+                manifest.sort(key=lambda entry: entry['index'])
+                archive.writestr('manifest.json', json.dumps({
+                    'succeeded': sum(1 for entry in manifest if entry['status'] == 'ok'),
+                    'failed': sum(1 for entry in manifest if entry['status'] != 'ok'),
+                    'items': manifest,
+                }, indent=2))
+            yield sink.drain()
+        finally:
+            # Client went away: don't compile what nobody will receive
+            cancel_event.set()
+            for future in futures:
+                future.cancel()
+    
+    return app.response_class(
+        stream(),
+        mimetype='application/zip',
+        headers={'Content-Disposition': 'attachment; filename=resumes.zip', 'X-Request-ID': batch_id}
+    )
+
+# Operator endpoints (debug capture, template reload) need X-Admin-Token to match
+# ADMIN_TOKEN; without ADMIN_TOKEN they are disabled
+ADMIN_TOKEN = os.environ.get('ADMIN_TOKEN') or None
+
+def admin_only(view):
+    @functools.wraps(view)
+    def wrapper(*args, **kwargs):
+        if ADMIN_TOKEN is None:
+            return jsonify({'error': 'Admin endpoints are disabled (set ADMIN_TOKEN to enable them)'}), 403
+        token = request.headers.get('X-Admin-Token', '')
+        if not hmac.compare_digest(token.encode('utf-8'), ADMIN_TOKEN.encode('utf-8')):
+            return jsonify({'error': 'Invalid or missing X-Admin-Token'}), 401
+        return view(*args, **kwargs)
+    return wrapper
+
+@app.route('/debug/capture', methods=['GET', 'POST'])
+@admin_only
+def debug_capture_config():
+    if request.method == 'POST':
+        options = request.get_json(silent=True) or {}
+        size = options.get('size')
+        if size is not None:
+            try:
+                if isinstance(size, bool):
+                    raise ValueError(size)
+                size = int(size)
+            except (TypeError, ValueError):
+                return jsonify({'error': "'size' must be an integer"}), 400
+        flags = {name: options.get(name) for name in ('enabled', 'spill')}
+        if any(value is not None and not isinstance(value, bool) for value in flags.values()):
+            return jsonify({'error': "'enabled' and 'spill' must be true or false"}), 400
+        return jsonify(debug_capture.configure(size=size, **flags))
+    return jsonify(debug_capture.config())
+
+@app.route('/debug/requests', methods=['GET'])
+@admin_only
+def debug_requests():
+    return jsonify({'capture': debug_capture.config(), 'requests': debug_capture.summaries()})
+
+@app.route('/debug/requests/<request_id>', methods=['GET'])
+@admin_only
+def debug_request(request_id):
+    artifacts = debug_capture.get(request_id)
+    if artifacts is None:
+        return jsonify({'error': 'No debug artifacts for this request'}), 404
+    return jsonify({'request_id': request_id, 'artifacts': artifacts})
+
+@app.route('/debug/requests/<request_id>/<name>', methods=['GET'])
+@admin_only
+def debug_request_artifact(request_id, name):
+    artifacts = debug_capture.get(request_id) or {}
+    if name not in artifacts:
+        return jsonify({'error': 'No such debug artifact'}), 404
+    return app.response_class(artifacts[name], mimetype='text/plain')
+
+@app.route('/reload_template', methods=['POST'])
+@admin_only
+def reload_template():
+    # Runs beside in-flight requests, which keep the template version they started with.
+    # Cached PDFs are keyed on the template version, so stale ones are never served.
+    versions, errors = reload_latex_templates()
+    return jsonify({'status': 'reloaded' if not errors else 'partial', 'templates': versions, 'errors': errors})
+
+@app.route('/metrics', methods=['GET'])
+def metrics_endpoint():
+    # Fold in the counters other components already keep
+    cache_stats = pdf_cache.stats()
+    metrics.set('resume_pdf_cache_lookups_total', cache_stats['hits'], result='hit')
+    metrics.set('resume_pdf_cache_lookups_total', cache_stats['misses'], result='miss')
+    with _compile_stats_lock:
+        for passes, count in compile_pass_counts.items():
+            metrics.set('resume_latex_passes_total', count, passes=passes)
+    with _jobs_lock:
+        for state in ('queued', 'running', 'done', 'failed', 'cancelled'):
+            metrics.set('resume_jobs', sum(1 for job in _jobs.values() if job['status'] == state), state=state)
+    metrics.set('resume_sandbox_overflows_total', sandbox_pool.stats()['overflows'])
+    return app.response_class(metrics.render(), mimetype='text/plain; version=0.0.4')
 
 @app.route('/health', methods=['GET'])
 def health_check():
-    return jsonify({'status': 'ok'})
+    return jsonify(health_status())
+
+# Service state reported by /health (shared with the ASGI entry point)
+def health_status():
+    with _compile_stats_lock:
+        latex_passes = {str(passes): count for passes, count in sorted(compile_pass_counts.items())}
+    with _jobs_lock:
+        jobs = {
+            'workers': COMPILE_WORKERS,
+            'queue_limit': JOB_QUEUE_LIMIT,
+            'queued': sum(1 for job in _jobs.values() if job['status'] == 'queued'),
+            'running': sum(1 for job in _jobs.values() if job['status'] == 'running'),
+        }
+    return {
+        'status': 'ok',
+        'pdf_cache': pdf_cache.stats(),
+        'latex_passes': latex_passes,
+        'jobs': jobs,
+        'sandboxes': sandbox_pool.stats(),
+        'single_flight': pdf_flights.stats(),
+        'admission': {'rate_limit': rate_limiter.stats(), 'compiles': compile_gate.stats()},
+        'engines': [engine for engine in RENDER_ENGINES if engine != 'native' or fitz is not None],
+        'templates': {
+            name: {
+                'version': entry['version'],
+                'format': entry['format'] is not None,
+                'loaded_at': entry['loaded_at'],
+                'warmup_ms': round(entry['warmup_seconds'] * 1000, 2) if entry['warmup_seconds'] is not None else None,
+            }
+            for name, entry in list(_template_registry.items())
+        },
+    }
+
+# Compile and warm every template at startup so requests never pay for it
+reload_latex_templates()
 
 if __name__ == '__main__':
     app.run(debug=True, host='0.0.0.0', port=5000)
\ No newline at end of file
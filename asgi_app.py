@@ -0,0 +1,412 @@
+"""Async (ASGI) entry point for the resume PDF service.
+
+Serves the same POST /generate_resume and GET /health contract as app.py, but
+pdflatex runs through asyncio subprocesses: a waiting or idle connection costs a
+coroutine rather than a worker thread, and an asyncio.Semaphore caps concurrent
+compiles (ASGI_COMPILE_SLOTS, default: MAX_CONCURRENT_COMPILES), with the same
+bounded wait queue and per-client rate limits as app.py. Everything else
+(validation, sanitizer, templates, PDF cache, sandboxes, native engine) is shared
+with app.py.
+
+Run with any ASGI server, e.g.:
+    uvicorn asgi_app:app --host 0.0.0.0 --port 8000
+"""
+import asyncio
+import json
+import math
+import os
+import signal
+import subprocess
+import time
+from urllib.parse import parse_qs
+
+import app as service
+
+# Concurrent pdflatex compiles; must not exceed the sandbox pool or compiles spill into overflow dirs
+ASGI_COMPILE_SLOTS = max(1, int(os.environ.get('ASGI_COMPILE_SLOTS', service.MAX_CONCURRENT_COMPILES)))
+# Largest request body accepted, in bytes
+ASGI_MAX_BODY_BYTES = int(os.environ.get('ASGI_MAX_BODY_BYTES', 2 * 1024 * 1024))
+
+_compile_slots = None  # asyncio.Semaphore, created on the server's event loop
+_compiles_waiting = 0
+_compiles_running = 0
+_compiles_rejected = 0
+_compile_seconds_avg = 2.0  # moving average of slot hold time, for Retry-After
+
+
+def compile_slots():
+    global _compile_slots
+    if _compile_slots is None:
+        _compile_slots = asyncio.Semaphore(ASGI_COMPILE_SLOTS)
+    return _compile_slots
+
+
+# Async counterpart of service.run_pdflatex(): one pass in its own process group,
+# killed with its children on timeout or when the awaiting task is cancelled
+async def run_pdflatex_async(args, work_dir, env, deadline):
+    process = await asyncio.create_subprocess_exec(
+        *service.limited_latex_command(args),
+        cwd=work_dir,
+        env=env,
+        stdin=subprocess.DEVNULL,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        start_new_session=True,
+    )
+    service.limit_latex_resources(process.pid)
+    try:
+        stdout, stderr = await asyncio.wait_for(process.communicate(), max(0.0, deadline - time.monotonic()))
+    except (asyncio.TimeoutError, asyncio.CancelledError) as e:
+        reason = 'timeout' if isinstance(e, asyncio.TimeoutError) else 'cancelled'
+        try:
+            os.killpg(process.pid, signal.SIGKILL)
+        except ProcessLookupError:
+            pass
+        await asyncio.shield(process.wait())
+        service.metrics.inc('resume_compiles_killed_total', reason=reason)
+        if reason == 'cancelled':
+            raise
+        raise service.CompileKilled(reason)
+
+    if service.resource and process.returncode in (-signal.SIGXCPU, -signal.SIGKILL, -signal.SIGXFSZ):
+        service.metrics.inc('resume_compiles_killed_total', reason='resource_limit')
+    return subprocess.CompletedProcess(
+        args, process.returncode, stdout.decode('utf-8', 'replace'), stderr.decode('utf-8', 'replace')
+    )
+
+
+# Async counterpart of service.compile_latex(): same pass loop, format fallback and limits
+async def compile_latex_async(rendered_tex, work_dir, fmt_name, timer, asset_dir=None, deadline=None):
+    deadline = deadline or time.monotonic() + service.LATEX_TIMEOUT_SECONDS
+    args, env, fmt_name = await asyncio.to_thread(
+        service.prepare_latex_compile, rendered_tex, work_dir, fmt_name, asset_dir
+    )
+
+    passes = 0
+    previous_aux_hash = None
+    while True:
+        start = time.perf_counter()
+        process = await run_pdflatex_async(args, work_dir, env, deadline)
+        passes += 1
+        timer.record(f'pass{passes}', time.perf_counter() - start)
+        if process.returncode != 0 or passes >= service.MAX_LATEX_PASSES:
+            break
+        rerun, previous_aux_hash = await asyncio.to_thread(service.latex_pass_needs_rerun, work_dir, previous_aux_hash)
+        if not rerun:
+            break
+
+    if service.format_compile_failed(work_dir, fmt_name):
+        return await compile_latex_async(rendered_tex, work_dir, None, timer, asset_dir, deadline)
+
+    service.record_compile_passes(passes)
+    return process, passes
+
+
+def reject_compile(reason):
+    global _compiles_rejected
+    _compiles_rejected += 1
+    service.metrics.inc('resume_rejected_requests_total', reason=reason)
+    retry_after = max(1, math.ceil((_compiles_waiting + 1) / ASGI_COMPILE_SLOTS * _compile_seconds_avg))
+    raise service.Overloaded(reason, retry_after)
+
+
+# Async counterpart of service.build_resume_pdf(), run under a compile slot. Like
+# service.compile_gate, at most COMPILE_QUEUE_LIMIT compiles wait for a slot, for at
+# most COMPILE_QUEUE_TIMEOUT seconds, before Overloaded is raised.
+async def build_resume_pdf_async(processed_data, template_entry, timer):
+    global _compiles_waiting, _compiles_running, _compile_seconds_avg
+    slots = compile_slots()
+    if slots.locked() and _compiles_waiting >= service.COMPILE_QUEUE_LIMIT:
+        reject_compile('queue_full')
+    _compiles_waiting += 1
+    try:
+        with timer.stage('compile_wait'):
+            await asyncio.wait_for(slots.acquire(), service.COMPILE_QUEUE_TIMEOUT)
+    except asyncio.TimeoutError:
+        reject_compile('queue_timeout')
+    finally:
+        _compiles_waiting -= 1
+
+    _compiles_running += 1
+    started_at = time.perf_counter()
+    work_dir, pooled = service.sandbox_pool.checkout()
+    try:
+        with timer.stage('render'):
+            rendered_tex = template_entry['template'].render(**processed_data)
+        service.metrics.inc('resume_compiles_in_flight')
+        try:
+            process, passes = await compile_latex_async(
+                rendered_tex, work_dir, template_entry['format'], timer, template_entry['assets']
+            )
+        finally:
+            service.metrics.inc('resume_compiles_in_flight', -1)
+        return await asyncio.to_thread(service.collect_build_result, work_dir, rendered_tex, process, passes, timer)
+    finally:
+        _compiles_running -= 1
+        _compile_seconds_avg = 0.8 * _compile_seconds_avg + 0.2 * (time.perf_counter() - started_at)
+        try:
+            # Emptying the sandbox touches the filesystem; keep it off the event loop, and
+            # hand the slot on only once the sandbox is back so the next compile finds it
+            await asyncio.shield(asyncio.to_thread(service.sandbox_pool.release, work_dir, pooled))
+        finally:
+            compile_slots().release()
+
+
+# Async counterpart of service.SingleFlight: identical in-flight builds share one task.
+# Each waiter awaits it through a shield, so a disconnecting client only cancels the
+# build once no other request is still waiting for it.
+class AsyncSingleFlight:
+    def __init__(self):
+        self._calls = {}  # key -> [task, waiter count]
+        self.leaders = 0
+        self.coalesced = 0
+
+    async def do(self, key, build):
+        while True:
+            call = self._calls.get(key)
+            coalesced = call is not None
+            if coalesced:
+                self.coalesced += 1
+                service.metrics.inc('resume_coalesced_requests_total')
+            else:
+                self.leaders += 1
+                call = self._calls[key] = [asyncio.ensure_future(build()), 0]
+                call[0].add_done_callback(lambda _, call=call: self._forget(key, call))
+            call[1] += 1
+            try:
+                # wait() never cancels the shared task, so a CancelledError
+                # here always means this waiter itself was cancelled.
+                await asyncio.wait({call[0]})
+            except asyncio.CancelledError:
+                if not call[0].done() and call[1] == 1:
+                    call[0].cancel()
+                raise
+            finally:
+                call[1] -= 1
+            if not call[0].cancelled():
+                return call[0].result(), coalesced
+            # The leader's waiters all went away and took the build with
+            # them; start over with a fresh leader.
+            self._forget(key, call)
+
+    def _forget(self, key, call):
+        if self._calls.get(key) is call:
+            del self._calls[key]
+
+    def stats(self):
+        return {'in_flight': len(self._calls), 'leaders': self.leaders, 'coalesced': self.coalesced}
+
+
+pdf_flights = AsyncSingleFlight()
+
+
+# Async counterpart of service.generate_pdf()
+async def generate_pdf_async(data, request_id, known_etags, timer, engine):
+    service.debug_capture.record(request_id, 'debug_input.json', data)
+    if engine == 'native':
+        return await asyncio.to_thread(service.generate_native_pdf, data, request_id, known_etags, timer)
+
+    # The PDF cache takes a lock shared with worker threads and may read its disk
+    # tier, so lookups and stores run off the event loop
+    lookup = await asyncio.to_thread(service.lookup_pdf, data, request_id, known_etags, timer)
+    if lookup['result'] is not None:
+        return lookup['result']
+
+    async def build():
+        build_started_at = time.perf_counter()
+        result = await build_resume_pdf_async(lookup['processed_data'], lookup['template_entry'], timer)
+        return await asyncio.to_thread(
+            service.store_pdf, result, lookup, request_id, timer, time.perf_counter() - build_started_at
+        )
+
+    coalesced_started_at = time.perf_counter()
+    result, coalesced = await pdf_flights.do(lookup['cache_key'], build)
+    if coalesced:
+        timer.record('coalesced_wait', time.perf_counter() - coalesced_started_at)
+    return result
+
+
+def parse_if_none_match(value):
+    return frozenset(tag.strip().removeprefix('W/').strip('"') for tag in value.split(',') if tag.strip())
+
+
+async def send_response(send, status, body=b'', content_type=None, headers=()):
+    header_list = [(b'content-length', str(len(body)).encode())]
+    if content_type:
+        header_list.append((b'content-type', content_type.encode()))
+    header_list.extend((name.lower().encode(), value.encode('latin-1')) for name, value in headers)
+    await send({'type': 'http.response.start', 'status': status, 'headers': header_list})
+    await send({'type': 'http.response.body', 'body': body})
+
+
+async def send_json(send, status, payload, headers=()):
+    await send_response(send, status, json.dumps(payload).encode('utf-8'), 'application/json', headers)
+
+
+async def send_overloaded(send, e, request_id):
+    await send_json(send, 429, {'error': str(e), 'reason': e.reason, 'request_id': request_id},
+                    headers=[('Retry-After', str(e.retry_after))])
+
+
+class ClientDisconnected(Exception):
+    pass
+
+
+# Read the whole request body; None when it exceeds ASGI_MAX_BODY_BYTES
+async def read_body(receive):
+    chunks = []
+    size = 0
+    while True:
+        message = await receive()
+        if message['type'] == 'http.disconnect':
+            raise ClientDisconnected()
+        chunk = message.get('body', b'')
+        size += len(chunk)
+        if size > ASGI_MAX_BODY_BYTES:
+            return None
+        chunks.append(chunk)
+        if not message.get('more_body'):
+            return b''.join(chunks)
+
+
+# Resolve once the client goes away, so its compile can be cancelled
+async def wait_for_disconnect(receive):
+    while (await receive())['type'] != 'http.disconnect':
+        pass
+
+
+def record_request(outcome, started_at):
+    service.record_request('generate_resume', outcome, started_at)
+
+
+async def generate_resume(scope, receive, send):
+    started_at = time.perf_counter()
+    headers = {name.decode('latin-1').lower(): value.decode('latin-1') for name, value in scope['headers']}
+    request_id = service.get_request_id(headers.get('x-request-id', ''))
+    query = parse_qs(scope.get('query_string', b'').decode('latin-1'))
+    engine, engine_error = service.get_render_engine(query.get('engine', ['latex'])[0])
+    if engine_error:
+        return await send_json(send, 400, {'error': engine_error, 'request_id': request_id})
+
+    client = service.rate_limit_client(headers.get('x-api-key'), (scope.get('client') or (None,))[0],
+                                       headers.get('x-forwarded-for'))
+    try:
+        service.rate_limiter.consume(client)
+    except service.Overloaded as e:
+        record_request('rejected', started_at)
+        return await send_overloaded(send, e, request_id)
+
+    timer = service.StageTimer()
+    with timer.stage('parse'):
+        try:
+            body = await read_body(receive)
+        except ClientDisconnected:
+            record_request('disconnected', started_at)
+            return
+        if body is None:
+            return await send_json(send, 413, {'error': 'Request body too large', 'request_id': request_id})
+        try:
+            data = json.loads(body)
+        except ValueError:
+            data = None
+    try:
+        with timer.stage('validate'):
+            data = service.validate_payload(data)
+    except service.InvalidPayload as e:
+        record_request('invalid', started_at)
+        return await send_json(send, 400, {'error': 'Invalid resume payload', 'fields': e.errors,
+                                           'request_id': request_id})
+
+    # Compile while watching for the client to disconnect; a gone client's compile is killed
+    known_etags = parse_if_none_match(headers.get('if-none-match', ''))
+    generate = asyncio.ensure_future(generate_pdf_async(data, request_id, known_etags, timer, engine))
+    disconnect = asyncio.ensure_future(wait_for_disconnect(receive))
+    try:
+        await asyncio.wait({generate, disconnect}, return_when=asyncio.FIRST_COMPLETED)
+    finally:
+        disconnect.cancel()
+    if not generate.done():
+        generate.cancel()
+        record_request('disconnected', started_at)
+        return
+
+    try:
+        result = generate.result()
+    except service.Overloaded as e:
+        record_request('rejected', started_at)
+        return await send_overloaded(send, e, request_id)
+    except service.CompileKilled as e:
+        record_request('killed', started_at)
+        return await send_json(send, 504, {'error': str(e), 'request_id': request_id})
+    except Exception as e:
+        record_request('failure', started_at)
+        service.app.logger.exception('Request %s failed: %s', request_id, e)
+        return await send_json(send, 500, {'error': str(e), 'request_id': request_id,
+                                           'details': service.debug_hint(request_id)})
+
+    etag_header = ('ETag', f'"{result["etag"]}"')
+    if result.get('not_modified'):
+        record_request('not_modified', started_at)
+        return await send_response(send, 304, headers=[etag_header, ('X-Request-ID', request_id)])
+    if result['pdf'] is None:
+        record_request('failure', started_at)
+        return await send_json(send, 500, {'error': 'Failed to generate PDF', 'request_id': request_id,
+                                           'details': service.debug_hint(request_id)})
+
+    response_headers = [
+        ('Content-Disposition', 'attachment; filename=resume.pdf'),
+        ('X-LaTeX-Passes', str(result['passes'])),
+        ('X-Request-ID', request_id),
+        etag_header,
+    ]
+    if service.SERVER_TIMING:
+        response_headers.append(('Server-Timing', timer.server_timing()))
+    record_request('success', started_at)
+    await send_response(send, 200, result['pdf'], 'application/pdf', response_headers)
+
+
+async def health(scope, receive, send):
+    status = await asyncio.to_thread(service.health_status)
+    status['server'] = 'asgi'
+    # LaTeX builds coalesce on the event loop; native ones still go through app.py's threads
+    threaded = status['single_flight']
+    status['single_flight'] = {name: value + threaded[name] for name, value in pdf_flights.stats().items()}
+    status['compiles'] = {
+        'slots': ASGI_COMPILE_SLOTS,
+        'running': _compiles_running,
+        'waiting': _compiles_waiting,
+        'queue_limit': service.COMPILE_QUEUE_LIMIT,
+        'queue_timeout_s': service.COMPILE_QUEUE_TIMEOUT,
+        'rejected': _compiles_rejected,
+    }
+    await send_json(send, 200, status)
+
+
+ROUTES = {
+    ('POST', '/generate_resume'): generate_resume,
+    ('GET', '/health'): health,
+}
+
+
+async def lifespan(receive, send):
+    while True:
+        message = await receive()
+        if message['type'] == 'lifespan.startup':
+            compile_slots()
+            await send({'type': 'lifespan.startup.complete'})
+        elif message['type'] == 'lifespan.shutdown':
+            await send({'type': 'lifespan.shutdown.complete'})
+            return
+
+
+async def app(scope, receive, send):
+    if scope['type'] == 'lifespan':
+        return await lifespan(receive, send)
+    if scope['type'] != 'http':
+        return
+    handler = ROUTES.get((scope['method'], scope['path']))
+    if handler is None:
+        known_path = any(path == scope['path'] for _, path in ROUTES)
+        return await send_json(send, 405 if known_path else 404,
+                               {'error': 'Method not allowed' if known_path else 'Not found'})
+    await handler(scope, receive, send)
@@ -0,0 +1,706 @@
+"""Benchmarks for the resume PDF service (app.py).
+
+Usage:
+    python benchmark.py compile [--runs N] [--payload debug_input.json]
+    python benchmark.py stress [--requests N] [--concurrency C] [--url URL]
+    python benchmark.py sanitize [--sizes 1,10,100,1000] [--runs N]
+    python benchmark.py engines [--requests N] [--concurrency C] [--engines latex,native] [--url URL]
+    python benchmark.py visual-diff [--payload debug_input.json] [--dpi D] [--out DIR] [--url URL]
+    python benchmark.py load [--sizes small,large] [--concurrency 1,8] [--rates 5,20] [--requests N]
+                             [--url URL] [--out report.json] [--baseline previous.json]
+    python benchmark.py servers --servers flask=http://127.0.0.1:5000,asgi=http://127.0.0.1:8000
+                                [--concurrency 64,256] [--idle-connections 1000]
+    python benchmark.py coalesce [--clients K] [--engine latex] [--url URL]
+    python benchmark.py ats [--payload debug_input.json] [--job job.txt] [--runs N]
+"""
+import argparse
+import hashlib
+import json
+import os
+import random
+import re
+import shutil
+import socket
+import statistics
+import sys
+import tempfile
+import threading
+import time
+import unicodedata
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlparse
+
+import app
+
+
+def summarize(samples):
+    """Summarize a list of latencies (seconds) as milliseconds"""
+    ordered = sorted(samples)
+
+    def percentile(p):
+        return ordered[min(len(ordered) - 1, int(round(p / 100 * (len(ordered) - 1))))]
+
+    return {
+        "runs": len(ordered),
+        "mean_ms": round(statistics.mean(ordered) * 1000, 2),
+        "p50_ms": round(percentile(50) * 1000, 2),
+        "p95_ms": round(percentile(95) * 1000, 2),
+        "p99_ms": round(percentile(99) * 1000, 2),
+        "max_ms": round(ordered[-1] * 1000, 2),
+    }
+
+
+def load_payload(path):
+    """Load a resume payload from a JSON file"""
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def bench_compile(args):
+    """Compile latency with the plain preamble vs. the precompiled format"""
+    entry = app.get_latex_template()
+    rendered_tex = entry["template"].render(**app.process_data(load_payload(args.payload)))
+    modes = {"plain": None}
+    if entry["format"]:
+        modes["format"] = entry["format"]
+    else:
+        print("Preamble format could not be built; only the plain path is measured.")
+
+    results = {}
+    for mode, fmt_name in modes.items():
+        samples = []
+        for _ in range(args.runs):
+            work_dir = tempfile.mkdtemp()
+            try:
+                start = time.perf_counter()
+                app.compile_latex(rendered_tex, work_dir, fmt_name)
+                samples.append(time.perf_counter() - start)
+                if not os.path.exists(os.path.join(work_dir, "resume.pdf")):
+                    raise RuntimeError(f"{mode} compile did not produce a PDF")
+            finally:
+                shutil.rmtree(work_dir, ignore_errors=True)
+        results[mode] = summarize(samples)
+
+    if "format" in results:
+        results["speedup"] = round(results["plain"]["mean_ms"] / results["format"]["mean_ms"], 2)
+    return results
+
+
+WORDS = (
+    "designed built scaled migrated optimized distributed latency throughput Python Go Kubernetes "
+    "PostgreSQL Kafka Redis pipelines microservices réseau données Größe naïve café 数据 服务 😀"
+).split()
+SPECIALS = ["C#", "R&D", "100%", "$2M", "snake_case", "{json}", "~5x", "2^10", "<50ms>", "C:\\tools"]
+
+
+def synthetic_sentence(rng, words):
+    """A random bullet with LaTeX special characters and unicode mixed in"""
+    tokens = [rng.choice(WORDS) for _ in range(words)]
+    for _ in range(max(1, words // 6)):
+        tokens.insert(rng.randrange(len(tokens) + 1), rng.choice(SPECIALS))
+    return "  ".join(tokens) if rng.random() < 0.2 else " ".join(tokens)
+
+
+def synthetic_payload(scale, seed=0):
+    """A resume payload whose jobs, projects and bullets grow with scale"""
+    rng = random.Random(seed)
+    jobs = max(1, scale)
+    bullets = min(40, 3 + scale // 2)
+    return {
+        "Full_Name": f"Synthetic Candidate {seed}",
+        "Designation": "Senior Software Engineer",
+        "Email": f"candidate{seed}@example.com",
+        "Mobile": "+1-555-000-0000",
+        "Location": "Zürich, Switzerland",
+        "Linkedin_url": f"linkedin.com/in/candidate{seed}",
+        "github_url": f"github.com/candidate{seed}",
+        "summary": synthetic_sentence(rng, 60),
+        "skills_data": {
+            f"Category {c}": [rng.choice(WORDS) for _ in range(6)] for c in range(min(8, 2 + scale // 10))
+        },
+        "experience": [
+            {
+                "title": f"Engineer {j}",
+                "company": f"Company {j} & Sons",
+                "location": "Remote",
+                "duration": "January 2020 - Present",
+                "responsibilities": [synthetic_sentence(rng, 25) for _ in range(bullets)],
+            }
+            for j in range(jobs)
+        ],
+        "projects": [
+            {
+                "title": f"Project_{p}",
+                "link": f"github.com/candidate{seed}/project_{p}",
+                "type": "Open Source",
+                "duration": "2023",
+                "details": [synthetic_sentence(rng, 20) for _ in range(bullets)],
+            }
+            for p in range(max(1, jobs // 2))
+        ],
+        "education": [
+            {
+                "title": "B.Sc. Computer Science",
+                "university": "University of Somewhere",
+                "gpa": "3.9/4.0",
+                "duration": "2012 - 2016",
+                "details": [synthetic_sentence(rng, 15) for _ in range(3)],
+            }
+        ],
+        "certifications": [synthetic_sentence(rng, 6) for _ in range(min(20, 2 + scale))],
+        "achievements": [synthetic_sentence(rng, 10) for _ in range(min(20, 2 + scale))],
+    }
+
+
+def legacy_sanitize_latex(text):
+    """The original one-str.replace-per-character sanitizer, kept as the reference"""
+    if not isinstance(text, str):
+        return text
+    text = text.replace("\\", "\\textbackslash{}")
+    for char, replacement in {
+        "$": "\\$", "%": "\\%", "&": "\\&", "#": "\\#", "_": "\\_", "{": "\\{", "}": "\\}",
+        "~": "\\textasciitilde{}", "^": "\\textasciicircum{}", "<": "\\textless{}", ">": "\\textgreater{}",
+    }.items():
+        text = text.replace(char, replacement)
+    return re.sub(r"\s+", " ", text)
+
+
+def legacy_process_data(obj):
+    """The original recursive walker, kept as the reference"""
+    if isinstance(obj, dict):
+        return {k: legacy_process_data(v) for k, v in obj.items()}
+    elif isinstance(obj, list):
+        return [legacy_process_data(item) for item in obj]
+    return legacy_sanitize_latex(obj)
+
+
+def bench_sanitize(args):
+    """process_data() against the original implementation on growing synthetic payloads"""
+    results = []
+    for scale in (int(size) for size in args.sizes.split(",")):
+        payload = synthetic_payload(scale)
+        if app.process_data(payload) != legacy_process_data(payload):
+            raise RuntimeError(f"process_data output differs from the reference at scale {scale}")
+        row = {"scale": scale, "payload_bytes": len(json.dumps(payload, ensure_ascii=False).encode("utf-8"))}
+        for name, func in (("legacy", legacy_process_data), ("current", app.process_data)):
+            samples = []
+            for _ in range(args.runs):
+                start = time.perf_counter()
+                func(payload)
+                samples.append(time.perf_counter() - start)
+            row[name] = summarize(samples)
+        row["speedup"] = round(row["legacy"]["mean_ms"] / max(row["current"]["mean_ms"], 1e-6), 2)
+        results.append(row)
+    return {"results": results}
+
+
+def lift_admission_limits():
+    """Turn off rate limiting and queue rejection for in-process runs
+
+    Every in-process request comes from the same test client address, so the
+    per-client limiter and the compile queue would reject most of the load.
+    The number of concurrent compiles stays at the configured limit.
+    """
+    app.rate_limiter.rate = 0
+    app.compile_gate.queue_limit = float("inf")
+    app.compile_gate.queue_timeout = float("inf")
+
+
+def post_resume(payload, url=None, path="/generate_resume"):
+    """POST a payload to a running service, or to app.py in-process when no URL is given"""
+    if url:
+        import requests
+
+        response = requests.post(url.rstrip("/") + path, json=payload, timeout=120)
+        return response.status_code, response.content, dict(response.headers)
+    response = app.app.test_client().post(path, json=payload)
+    return response.status_code, response.get_data(), dict(response.headers)
+
+
+def pdf_text(pdf_bytes):
+    """Extract the text of a PDF, or None when PyMuPDF is not installed"""
+    try:
+        import fitz
+    except ImportError:
+        return None
+    with fitz.open("pdf", pdf_bytes) as doc:
+        return "".join(page.get_text("text") for page in doc)
+
+
+def bench_stress(args):
+    """N parallel distinct requests must return N correct, distinct PDFs"""
+    base = load_payload(args.payload)
+    names = [f"Stress Candidate {i:04d}" for i in range(args.requests)]
+    latencies = []
+    lock = threading.Lock()
+
+    def run(name):
+        start = time.perf_counter()
+        status, body, _ = post_resume(dict(base, Full_Name=name), args.url)
+        with lock:
+            latencies.append(time.perf_counter() - start)
+        return name, status, body
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        results = list(pool.map(run, names))
+    elapsed = time.perf_counter() - start
+
+    failures = []
+    digests = set()
+    for name, status, body in results:
+        if status != 200 or not body.startswith(b"%PDF"):
+            failures.append({"name": name, "status": status, "body": body[:200].decode("utf-8", "replace")})
+            continue
+        digests.add(hashlib.sha256(body).hexdigest())
+        # Each PDF must carry its own candidate's name, not a neighbour's
+        text = pdf_text(body)
+        if text is not None and name not in text:
+            failures.append({"name": name, "status": status, "body": "PDF belongs to another request"})
+
+    report = {
+        "requests": args.requests,
+        "concurrency": args.concurrency,
+        "succeeded": args.requests - len(failures),
+        "distinct_pdfs": len(digests),
+        "elapsed_s": round(elapsed, 3),
+        "latency": summarize(latencies),
+        "failures": failures[:10],
+    }
+    report["passed"] = not failures and len(digests) == args.requests
+    return report
+
+
+def bench_engines(args):
+    """Throughput and latency of the LaTeX and native renderers on distinct (uncached) payloads"""
+    base = load_payload(args.payload)
+    run_id = uuid.uuid4().hex[:8]
+    results = {}
+    for engine in args.engines.split(","):
+        def run(i):
+            start = time.perf_counter()
+            payload = dict(base, Full_Name=f"{engine} candidate {i:05d} {run_id}")
+            status, body, _ = post_resume(payload, args.url, f"/generate_resume?engine={engine}")
+            return time.perf_counter() - start, status == 200 and body.startswith(b"%PDF")
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+            outcomes = list(pool.map(run, range(args.requests)))
+        elapsed = time.perf_counter() - start
+        results[engine] = {
+            "requests": args.requests,
+            "concurrency": args.concurrency,
+            "errors": sum(1 for _, ok in outcomes if not ok),
+            "throughput_rps": round(args.requests / elapsed, 2),
+            "latency": summarize([seconds for seconds, _ in outcomes]),
+        }
+
+    if "latex" in results and "native" in results:
+        results["p99_speedup"] = round(results["latex"]["latency"]["p99_ms"] / results["native"]["latency"]["p99_ms"], 2)
+        results["throughput_ratio"] = round(results["native"]["throughput_rps"] / results["latex"]["throughput_rps"], 2)
+    results["passed"] = all(result["errors"] == 0 for result in results.values() if isinstance(result, dict))
+    return results
+
+
+def page_words(pdf_bytes):
+    """The set of words in a PDF, with ligatures and other compatibility forms folded"""
+    return set(unicodedata.normalize("NFKC", pdf_text(pdf_bytes)).split())
+
+
+def bench_visual_diff(args):
+    """Rasterize the LaTeX and native PDFs of one payload and compare them pixel by pixel"""
+    import fitz
+
+    payload = load_payload(args.payload)
+    pdfs = {}
+    for engine in ("latex", "native"):
+        status, body, _ = post_resume(payload, args.url, f"/generate_resume?engine={engine}")
+        if status != 200 or not body.startswith(b"%PDF"):
+            return {"passed": False, "error": f"{engine} engine returned {status}: {body[:200].decode('utf-8', 'replace')}"}
+        pdfs[engine] = body
+
+    pages = {}
+    for engine, pdf in pdfs.items():
+        with fitz.open("pdf", pdf) as doc:
+            pages[engine] = [page.get_pixmap(dpi=args.dpi, colorspace=fitz.csGRAY) for page in doc]
+
+    # Fraction of pixels whose gray level differs by more than the threshold, page by page
+    page_diffs = []
+    for number, (latex_page, native_page) in enumerate(zip(pages["latex"], pages["native"]), 1):
+        if (latex_page.width, latex_page.height) != (native_page.width, native_page.height):
+            page_diffs.append(1.0)
+            continue
+        latex_pixels, native_pixels = latex_page.samples, native_page.samples
+        diff = bytes(255 if abs(a - b) > args.threshold else 0 for a, b in zip(latex_pixels, native_pixels))
+        page_diffs.append(round(diff.count(255) / len(diff), 4))
+        if args.out:
+            os.makedirs(args.out, exist_ok=True)
+            latex_page.save(os.path.join(args.out, f"latex-{number}.png"))
+            native_page.save(os.path.join(args.out, f"native-{number}.png"))
+            fitz.Pixmap(fitz.csGRAY, latex_page.width, latex_page.height, diff, 0).save(
+                os.path.join(args.out, f"diff-{number}.png"))
+
+    latex_words, native_words = page_words(pdfs["latex"]), page_words(pdfs["native"])
+    text_similarity = len(latex_words & native_words) / max(1, len(latex_words | native_words))
+    report = {
+        "pages": {engine: len(rasters) for engine, rasters in pages.items()},
+        "page_diff_ratio": page_diffs,
+        "max_diff_ratio": max(page_diffs),
+        "text_similarity": round(text_similarity, 4),
+        "missing_words": sorted(latex_words - native_words)[:20],
+        "extra_words": sorted(native_words - latex_words)[:20],
+    }
+    report["passed"] = (
+        report["pages"]["latex"] == report["pages"]["native"]
+        and report["max_diff_ratio"] <= args.max_diff
+        and text_similarity >= args.min_text_similarity
+    )
+    return report
+
+
+# Named synthetic payload sizes for the load test (synthetic_payload scale)
+LOAD_SIZES = {"small": 1, "medium": 5, "large": 20, "xl": 50}
+
+
+def timed_post(payload, url, path, started_at=None):
+    """POST one payload and return (status, seconds); status is "error" when the request itself fails.
+
+    Latency is measured from started_at when given (the scheduled send time of an
+    open-loop request), so a backed-up client does not hide server queueing.
+    """
+    started_at = started_at if started_at is not None else time.perf_counter()
+    try:
+        status, _, _ = post_resume(payload, url, path)
+    except Exception:
+        status = "error"
+    return status, time.perf_counter() - started_at
+
+
+def load_result(outcomes, elapsed):
+    """Throughput, error rate and latency percentiles for one load-test run"""
+    status_counts = {}
+    for status, _ in outcomes:
+        status_counts[str(status)] = status_counts.get(str(status), 0) + 1
+    return {
+        "requests": len(outcomes),
+        "elapsed_s": round(elapsed, 3),
+        "throughput_rps": round(len(outcomes) / elapsed, 2),
+        "error_rate": round(sum(1 for status, _ in outcomes if status != 200) / len(outcomes), 4),
+        "status_counts": status_counts,
+        "latency": summarize([seconds for _, seconds in outcomes]),
+    }
+
+
+def run_closed_loop(payloads, concurrency, url, path):
+    """Keep exactly `concurrency` requests in flight until every payload is sent"""
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        outcomes = list(pool.map(lambda payload: timed_post(payload, url, path), payloads))
+    return load_result(outcomes, time.perf_counter() - start)
+
+
+def run_open_loop(payloads, rate, url, path, max_in_flight):
+    """Send requests at a fixed arrival rate regardless of how fast responses come back"""
+    futures = []
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=max_in_flight) as pool:
+        for i, payload in enumerate(payloads):
+            scheduled = start + i / rate
+            delay = scheduled - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            futures.append(pool.submit(timed_post, payload, url, path, scheduled))
+        outcomes = [future.result() for future in futures]
+    result = load_result(outcomes, time.perf_counter() - start)
+    result["offered_rps"] = rate
+    return result
+
+
+def compare_to_baseline(results, baseline, max_regression):
+    """Runs whose p99 or throughput got worse than the baseline by more than max_regression"""
+    previous = {(row["size"], row["mode"], row["level"]): row for row in baseline.get("results", [])}
+    regressions = []
+    for row in results:
+        before = previous.get((row["size"], row["mode"], row["level"]))
+        if before is None:
+            continue
+        p99_change = row["latency"]["p99_ms"] / max(before["latency"]["p99_ms"], 1e-6) - 1
+        throughput_change = row["throughput_rps"] / max(before["throughput_rps"], 1e-6) - 1
+        row["vs_baseline"] = {"p99": round(p99_change, 3), "throughput": round(throughput_change, 3)}
+        if p99_change > max_regression or throughput_change < -max_regression:
+            regressions.append({"size": row["size"], "mode": row["mode"], "level": row["level"], **row["vs_baseline"]})
+    return regressions
+
+
+def load_payloads(scale, count, seed, tag):
+    """count distinct synthetic payloads; the same content on every invocation, but tagged
+    so that neither earlier runs nor earlier invocations leave their PDFs in the cache"""
+    payloads = [synthetic_payload(scale, seed=seed + i) for i in range(count)]
+    for payload in payloads:
+        payload["Full_Name"] += f" {tag}"
+    return payloads
+
+
+def bench_load(args):
+    """Closed-loop and open-loop load test with synthetic payloads of several sizes"""
+    path = f"/generate_resume?engine={args.engine}"
+    run_id = uuid.uuid4().hex[:8]
+    runs = [("closed", int(level)) for level in args.concurrency.split(",") if level]
+    runs += [("open", float(level)) for level in args.rates.split(",") if level]
+
+    def make_payloads(scale, count, tag):
+        if args.repeat:
+            return [synthetic_payload(scale, seed=args.seed)] * count
+        return load_payloads(scale, count, args.seed, f"{run_id}-{tag}")
+
+    results = []
+    for size in args.sizes.split(","):
+        scale = LOAD_SIZES[size] if size in LOAD_SIZES else int(size)
+        for payload in make_payloads(scale, args.warmup, "warmup"):
+            timed_post(payload, args.url, path)
+
+        for run_index, (mode, level) in enumerate(runs):
+            payloads = make_payloads(scale, args.requests, run_index)
+            payload_bytes = len(json.dumps(payloads[0], ensure_ascii=False).encode("utf-8"))
+            if mode == "closed":
+                result = run_closed_loop(payloads, level, args.url, path)
+            else:
+                result = run_open_loop(payloads, level, args.url, path, args.max_in_flight)
+            results.append({"size": size, "scale": scale, "payload_bytes": payload_bytes,
+                            "mode": mode, "level": level, **result})
+
+    report = {
+        "config": {key: value for key, value in vars(args).items() if key != "func"},
+        "results": results,
+    }
+    report["passed"] = all(row["error_rate"] <= args.max_error_rate for row in results)
+    if args.baseline:
+        report["regressions"] = compare_to_baseline(results, load_payload(args.baseline), args.max_regression)
+        report["passed"] = report["passed"] and not report["regressions"]
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+    return report
+
+
+def hold_idle_connections(url, count):
+    """Open up to count TCP connections to the server and leave them idle"""
+    parsed = urlparse(url)
+    address = (parsed.hostname, parsed.port or (443 if parsed.scheme == "https" else 80))
+    connections = []
+    for _ in range(count):
+        try:
+            connections.append(socket.create_connection(address, timeout=5))
+        except OSError:
+            break
+    return connections
+
+
+def bench_servers(args):
+    """Flask vs. ASGI entry point under high client concurrency, with idle connections held open"""
+    servers = dict(item.split("=", 1) for item in args.servers.split(","))
+    path = f"/generate_resume?engine={args.engine}"
+    run_id = uuid.uuid4().hex[:8]
+    report = {}
+    for name, url in servers.items():
+        # Idle clients cost the threaded Flask server a thread each; the ASGI server a coroutine
+        idle = hold_idle_connections(url, args.idle_connections)
+        try:
+            runs = []
+            for level in (int(level) for level in args.concurrency.split(",")):
+                payloads = load_payloads(LOAD_SIZES[args.size], args.requests, args.seed, f"{run_id}-{name}-{level}")
+                result = run_closed_loop(payloads, level, url, path)
+                runs.append({"concurrency": level, **result})
+        finally:
+            for connection in idle:
+                connection.close()
+        report[name] = {"url": url, "idle_connections": len(idle), "runs": runs}
+
+    names = list(servers)
+    if len(names) == 2:
+        first, second = (report[name]["runs"] for name in names)
+        report["comparison"] = [
+            {
+                "concurrency": a["concurrency"],
+                f"{names[1]}_vs_{names[0]}_throughput": round(b["throughput_rps"] / max(a["throughput_rps"], 1e-6), 2),
+                f"{names[1]}_vs_{names[0]}_p99": round(b["latency"]["p99_ms"] / max(a["latency"]["p99_ms"], 1e-6), 2),
+            }
+            for a, b in zip(first, second)
+        ]
+    report["passed"] = all(run["error_rate"] <= args.max_error_rate
+                           for name in names for run in report[name]["runs"])
+    return report
+
+
+def get_health(url=None):
+    """GET /health from a running service, or from app.py in-process"""
+    if url:
+        import requests
+
+        return requests.get(url.rstrip("/") + "/health", timeout=30).json()
+    return app.app.test_client().get("/health").get_json()
+
+
+def bench_coalesce(args):
+    """K simultaneous identical requests must be served by exactly one build"""
+    payload = load_payloads(LOAD_SIZES[args.size], 1, args.seed, uuid.uuid4().hex[:8])[0]
+    path = f"/generate_resume?engine={args.engine}"
+    barrier = threading.Barrier(args.clients)
+
+    def run(_):
+        barrier.wait()
+        start = time.perf_counter()
+        status, body, _ = post_resume(payload, args.url, path)
+        return status, body, time.perf_counter() - start
+
+    before = get_health(args.url)["single_flight"]
+    with ThreadPoolExecutor(max_workers=args.clients) as pool:
+        results = list(pool.map(run, range(args.clients)))
+    after = get_health(args.url)["single_flight"]
+
+    builds = after["leaders"] - before["leaders"]
+    coalesced = after["coalesced"] - before["coalesced"]
+    statuses = [status for status, _, _ in results]
+    report = {
+        "clients": args.clients,
+        "engine": args.engine,
+        "builds": builds,
+        "coalesced": coalesced,
+        "statuses": {str(status): statuses.count(status) for status in set(statuses)},
+        "distinct_bodies": len({hashlib.sha256(body).hexdigest() for _, body, _ in results}),
+        "latency": summarize([seconds for _, _, seconds in results]),
+    }
+    # Clients that arrive after the build finished are cache hits rather than coalesced waiters
+    report["passed"] = builds == 1 and statuses == [200] * args.clients and report["distinct_bodies"] == 1
+    return report
+
+
+ATS_SAMPLE_JOB = """Senior Backend Engineer
+We are looking for a backend engineer to design and build RESTful APIs in Python
+with Flask or FastAPI. You will own PostgreSQL schemas, Redis caching and Celery
+task queues, deploy services with Docker and Kubernetes on AWS, and set up CI/CD
+pipelines and monitoring. Experience with GraphQL, Kafka and Terraform is a plus.
+Bachelor's degree in Computer Science or a related field.
+"""
+
+
+def bench_ats(args):
+    """Latency of the local ATS scorer, and a check that adding a job keyword never lowers a score"""
+    from Resume_Optimizer import ats_monotonicity_violations, score_ats_locally
+
+    payload = load_payload(args.payload)
+    job = ATS_SAMPLE_JOB
+    if args.job:
+        with open(args.job, "r", encoding="utf-8") as f:
+            job = f.read()
+    samples = []
+    for _ in range(args.runs):
+        start = time.perf_counter()
+        result = score_ats_locally(job, payload)
+        samples.append(time.perf_counter() - start)
+    violations = ats_monotonicity_violations(job, payload)
+    return {
+        "latency": summarize(samples),
+        "categories": result["categories"],
+        "overall": result["overall"],
+        "keywords_checked": len(result["matched"]) + len(result["missing"]),
+        "violations": [{"keyword": keyword, "category": category} for keyword, category in violations],
+        "passed": not violations,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    compile_parser = subparsers.add_parser("compile", help=bench_compile.__doc__)
+    compile_parser.add_argument("--runs", type=int, default=10)
+    compile_parser.add_argument("--payload", default="debug_input.json")
+    compile_parser.set_defaults(func=bench_compile)
+
+    stress_parser = subparsers.add_parser("stress", help=bench_stress.__doc__)
+    stress_parser.add_argument("--requests", type=int, default=32)
+    stress_parser.add_argument("--concurrency", type=int, default=8)
+    stress_parser.add_argument("--payload", default="debug_input.json")
+    stress_parser.add_argument("--url", help="base URL of a running service (default: in-process)")
+    stress_parser.set_defaults(func=bench_stress)
+
+    sanitize_parser = subparsers.add_parser("sanitize", help=bench_sanitize.__doc__)
+    sanitize_parser.add_argument("--sizes", default="1,10,100,1000")
+    sanitize_parser.add_argument("--runs", type=int, default=20)
+    sanitize_parser.set_defaults(func=bench_sanitize)
+
+    engines_parser = subparsers.add_parser("engines", help=bench_engines.__doc__)
+    engines_parser.add_argument("--requests", type=int, default=32)
+    engines_parser.add_argument("--concurrency", type=int, default=4)
+    engines_parser.add_argument("--engines", default="latex,native")
+    engines_parser.add_argument("--payload", default="debug_input.json")
+    engines_parser.add_argument("--url", help="base URL of a running service (default: in-process)")
+    engines_parser.set_defaults(func=bench_engines)
+
+    diff_parser = subparsers.add_parser("visual-diff", help=bench_visual_diff.__doc__)
+    diff_parser.add_argument("--payload", default="debug_input.json")
+    diff_parser.add_argument("--dpi", type=int, default=36, help="raster resolution; low values forgive font differences")
+    diff_parser.add_argument("--threshold", type=int, default=64, help="gray-level difference that counts as a changed pixel")
+    diff_parser.add_argument("--max-diff", type=float, default=0.15, help="largest allowed fraction of changed pixels per page")
+    diff_parser.add_argument("--min-text-similarity", type=float, default=0.9)
+    diff_parser.add_argument("--out", help="directory for the latex/native/diff PNGs of each page")
+    diff_parser.add_argument("--url", help="base URL of a running service (default: in-process)")
+    diff_parser.set_defaults(func=bench_visual_diff)
+
+    load_parser = subparsers.add_parser("load", help=bench_load.__doc__)
+    load_parser.add_argument("--sizes", default="small,medium,large",
+                             help=f"comma-separated sizes ({', '.join(LOAD_SIZES)}) or synthetic scales")
+    load_parser.add_argument("--concurrency", default="1,4,16", help="closed-loop concurrency levels ('' to skip)")
+    load_parser.add_argument("--rates", default="", help="open-loop arrival rates in requests/s ('' to skip)")
+    load_parser.add_argument("--requests", type=int, default=50, help="requests per run")
+    load_parser.add_argument("--warmup", type=int, default=2, help="unmeasured requests per size")
+    load_parser.add_argument("--max-in-flight", type=int, default=256, help="open-loop client thread cap")
+    load_parser.add_argument("--engine", default="latex", choices=("latex", "native"))
+    load_parser.add_argument("--seed", type=int, default=0)
+    load_parser.add_argument("--repeat", action="store_true", help="send one payload repeatedly (measures cache hits)")
+    load_parser.add_argument("--url", help="base URL of a running service (default: in-process)")
+    load_parser.add_argument("--out", help="also write the JSON report to this file")
+    load_parser.add_argument("--baseline", help="earlier report to compare p99 and throughput against")
+    load_parser.add_argument("--max-regression", type=float, default=0.2, help="allowed relative change vs. the baseline")
+    load_parser.add_argument("--max-error-rate", type=float, default=0.0)
+    load_parser.set_defaults(func=bench_load)
+
+    servers_parser = subparsers.add_parser("servers", help=bench_servers.__doc__)
+    servers_parser.add_argument("--servers", default="flask=http://127.0.0.1:5000,asgi=http://127.0.0.1:8000",
+                                help="comma-separated name=base_url pairs of running services")
+    servers_parser.add_argument("--concurrency", default="16,64,256")
+    servers_parser.add_argument("--requests", type=int, default=256, help="requests per concurrency level")
+    servers_parser.add_argument("--idle-connections", type=int, default=500, help="idle connections held during the runs")
+    servers_parser.add_argument("--size", default="small", choices=sorted(LOAD_SIZES))
+    servers_parser.add_argument("--engine", default="latex", choices=("latex", "native"))
+    servers_parser.add_argument("--seed", type=int, default=0)
+    servers_parser.add_argument("--max-error-rate", type=float, default=0.0)
+    servers_parser.set_defaults(func=bench_servers)
+
+    coalesce_parser = subparsers.add_parser("coalesce", help=bench_coalesce.__doc__)
+    coalesce_parser.add_argument("--clients", type=int, default=8, help="simultaneous identical requests (K)")
+    coalesce_parser.add_argument("--size", default="small", choices=sorted(LOAD_SIZES))
+    coalesce_parser.add_argument("--engine", default="latex", choices=("latex", "native"))
+    coalesce_parser.add_argument("--seed", type=int, default=0)
+    coalesce_parser.add_argument("--url", help="base URL of a running service (default: in-process)")
+    coalesce_parser.set_defaults(func=bench_coalesce)
+
+    ats_parser = subparsers.add_parser("ats", help=bench_ats.__doc__)
+    ats_parser.add_argument("--payload", default="debug_input.json")
+    ats_parser.add_argument("--job", help="job description text file (default: a built-in sample)")
+    ats_parser.add_argument("--runs", type=int, default=100)
+    ats_parser.set_defaults(func=bench_ats)
+
+    args = parser.parse_args()
+    if not getattr(args, "url", None):
+        lift_admission_limits()
+    report = args.func(args)
+    print(json.dumps(report, indent=2))
+    if report.get("passed") is False:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()